@@ -0,0 +1,189 @@
+import itertools
+import queue
+import threading
+import time
+import wave
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from tracing import get_tracer
+
+TTS_SAMPLE_RATE = 24000  # OpenAI's "pcm" speech format: 24 kHz, 16-bit, mono, little-endian
+TTS_SAMPLE_WIDTH = 2
+TTS_CHANNELS = 1
+
+BEEP_PRIORITY = 0
+SPEECH_PRIORITY = 1
+
+
+def load_wav_as_pcm(file_path: str, rate: int = TTS_SAMPLE_RATE) -> bytes:
+    """Read a WAV file and convert it to 16-bit mono PCM at the given rate."""
+    with wave.open(file_path, 'rb') as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        source_rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) * 256
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32)
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype=np.int32).astype(np.float32) / 65536
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width} bytes")
+
+    samples = samples.reshape(-1, channels).mean(axis=1)
+    if source_rate != rate and len(samples):
+        target_length = int(len(samples) * rate / source_rate)
+        samples = np.interp(np.linspace(0, len(samples) - 1, target_length), np.arange(len(samples)), samples)
+    return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+
+class PCMPlayer:
+    """Write raw PCM to a PyAudio output stream that is opened once and reused."""
+
+    def __init__(self, rate: int = TTS_SAMPLE_RATE, sample_width: int = TTS_SAMPLE_WIDTH,
+                 channels: int = TTS_CHANNELS):
+        self.rate = rate
+        self.sample_width = sample_width
+        self.channels = channels
+        self.frame_size = sample_width * channels
+
+        self._audio = None
+        self._stream = None
+
+    def write(self, data: bytes) -> None:
+        """Write whole frames to the output stream, opening it on first use."""
+        if self._stream is None:
+            import pyaudio
+
+            self._audio = pyaudio.PyAudio()
+            self._stream = self._audio.open(
+                format=self._audio.get_format_from_width(self.sample_width),
+                channels=self.channels,
+                rate=self.rate,
+                output=True
+            )
+        self._stream.write(data)
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+
+class PlaybackHandle:
+    """Tracks one submitted clip; done is set once it has played or been dropped."""
+
+    def __init__(self, kind: str = "speech"):
+        self.done = threading.Event()
+        self.interrupted = False
+        self.kind = kind
+        self.submitted_at = time.perf_counter()
+        self.turn = get_tracer().current_turn
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+
+class AudioScheduler:
+    """
+    The one thread that plays audio, so clips never play on top of each other.
+
+    Clips are iterables of PCM chunks (they may still be downloading) queued by
+    priority, then submission order. interrupt() drops everything queued before
+    it and stops the clip in flight within one write, which is how a new hotkey
+    press cuts off the previous answer. The beep is decoded once and kept in
+    memory.
+    """
+
+    def __init__(self, player: Optional[PCMPlayer] = None, write_milliseconds: int = 50):
+        self.player = player or PCMPlayer()
+        self.write_size = self.player.rate * self.player.frame_size * write_milliseconds // 1000
+        self.beep: Optional[bytes] = None
+
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, daemon=True, name="ultra-audio")
+        self._thread.start()
+
+    def load_beep(self, file_path: str) -> None:
+        try:
+            self.beep = load_wav_as_pcm(file_path, self.player.rate)
+        except (OSError, ValueError, wave.Error) as e:
+            print(f"Failed to load beep sound: {e}")
+
+    def submit(self, chunks: Iterable[bytes], priority: int = SPEECH_PRIORITY) -> PlaybackHandle:
+        """Queue a clip and return right away."""
+        handle = PlaybackHandle("beep" if priority == BEEP_PRIORITY else "speech")
+        with self._lock:
+            generation = self._generation
+        self._queue.put((priority, next(self._sequence), generation, chunks, handle))
+        return handle
+
+    def play(self, chunks: Iterable[bytes], priority: int = SPEECH_PRIORITY) -> bool:
+        """Queue a clip and block until it has played. Returns False if it was interrupted."""
+        handle = self.submit(chunks, priority)
+        handle.wait()
+        return not handle.interrupted
+
+    @property
+    def beep_seconds(self) -> float:
+        if self.beep is None:
+            return 0.0
+        return len(self.beep) / (self.player.rate * self.player.frame_size)
+
+    def play_beep(self) -> Optional[PlaybackHandle]:
+        if self.beep is None:
+            return None
+        return self.submit([self.beep], BEEP_PRIORITY)
+
+    def interrupt(self) -> None:
+        """Stop the clip that is playing and drop every clip queued so far."""
+        with self._lock:
+            self._generation += 1
+
+    def _is_current(self, generation: int) -> bool:
+        with self._lock:
+            return generation == self._generation
+
+    def _worker(self) -> None:
+        while True:
+            _, _, generation, chunks, handle = self._queue.get()
+            if not self._is_current(generation):
+                handle.interrupted = True
+                handle.done.set()
+                continue
+            started_at = time.perf_counter()
+            try:
+                for piece in self._pieces(chunks):
+                    if not self._is_current(generation):
+                        handle.interrupted = True
+                        break
+                    self.player.write(piece)
+            except Exception as e:
+                print(f"An error occurred during playback: {e}")
+            finally:
+                handle.done.set()
+                get_tracer().record("playback", time.perf_counter() - started_at, turn=handle.turn, kind=handle.kind,
+                                    queued_ms=round((started_at - handle.submitted_at) * 1000, 3),
+                                    interrupted=handle.interrupted)
+
+    def _pieces(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Re-cut chunks into frame-aligned pieces of at most write_size bytes."""
+        frame_size = self.player.frame_size
+        leftover = b""
+        for chunk in chunks:
+            data = leftover + chunk
+            usable = len(data) - len(data) % frame_size
+            for start in range(0, usable, self.write_size):
+                yield data[start:min(start + self.write_size, usable)]
+            leftover = data[usable:]
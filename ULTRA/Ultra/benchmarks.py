@@ -0,0 +1,198 @@
+"""
+Micro-benchmarks for Ultra's hot paths.
+
+    python benchmarks.py extractor <directory of saved .html pages>
+    python benchmarks.py recognition <directory of recorded .wav commands>
+    python benchmarks.py math
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+
+
+def time_calls(function, inputs, repeat: int):
+    """Return per-input median wall time in milliseconds."""
+    timings = []
+    for item in inputs:
+        samples = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            function(item)
+            samples.append((time.perf_counter() - start_time) * 1000)
+        timings.append(statistics.median(samples))
+    return timings
+
+
+def report(name: str, timings) -> None:
+    print(f"{name:<28} total {sum(timings):9.2f} ms   median {statistics.median(timings):8.3f} ms   "
+          f"max {max(timings):8.3f} ms")
+
+
+def legacy_extract(html: str) -> str:
+    """fetch_main_content's extraction before the single-pass extractor, for comparison."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    special_div = soup.find('div', class_='BNeawe iBp4i AP7Wnd')
+    special_message = ''
+    if special_div and special_div.get_text(strip=True):
+        special_message = f"[This is the most accurate and concise response]: {special_div.get_text()} "
+
+    content_elements = [special_message]
+    for selector in ['article', 'main', 'section', 'p', 'h1', 'h2', 'h3', 'ul', 'ol']:
+        for element in soup.find_all(selector):
+            text = element.get_text(separator=' ', strip=True)
+            if text:
+                content_elements.append(text)
+
+    main_content = ' '.join(content_elements)
+    if len(main_content) > 3500:
+        return main_content[:3497 - len(special_message)] + "..."
+    return main_content
+
+
+def benchmark_extractor(args) -> None:
+    from content_extractor import etree, extract_main_content
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.corpus, "*.htm*"))):
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            pages.append(file.read())
+    if not pages:
+        print(f"No .html files found in {args.corpus}")
+        return
+
+    def chunked(html):
+        return (html[i:i + 16384] for i in range(0, len(html), 16384))
+
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / 1024:.0f} KB, median of {args.repeat} runs per page")
+    legacy = time_calls(legacy_extract, pages, args.repeat)
+    report("bs4 find_all (old)", legacy)
+    stdlib = time_calls(lambda html: extract_main_content(chunked(html), use_lxml=False), pages, args.repeat)
+    report("single pass, html.parser", stdlib)
+    print(f"{'':<28} speedup {sum(legacy) / sum(stdlib):.1f}x")
+    if etree is not None:
+        fast = time_calls(lambda html: extract_main_content(chunked(html)), pages, args.repeat)
+        report("single pass, lxml", fast)
+        print(f"{'':<28} speedup {sum(legacy) / sum(fast):.1f}x")
+
+
+def load_wav_commands(directory: str):
+    """Read every .wav file in a directory as a speech_recognition AudioData."""
+    import speech_recognition as sr
+
+    commands = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        with sr.AudioFile(path) as source:
+            commands.append((os.path.basename(path), sr.Recognizer().record(source)))
+    return commands
+
+
+def benchmark_recognition(args) -> None:
+    import speech_recognition as sr
+    from speech_engine import TranscriptionEngine, audio_data_to_pcm
+    from speech_router import RecognitionRouter
+
+    commands = load_wav_commands(args.fixtures)
+    if not commands:
+        print(f"No .wav files found in {args.fixtures}")
+        return
+
+    engine = TranscriptionEngine(args.model)
+    router = RecognitionRouter(engine, language_engine=TranscriptionEngine(args.language_model))
+    router.load_in_background()
+    engine.wait_until_ready()
+    router.language_engine.wait_until_ready()
+
+    def google_then_whisper(audio):
+        """listen()'s strategy before the router: Google uk-UA first, Whisper when that fails."""
+        try:
+            return sr.Recognizer().recognize_google(audio, language="uk-UA")
+        except sr.UnknownValueError:
+            return engine.transcribe(audio_data_to_pcm(audio))["text"]
+
+    def local_first(audio):
+        return router.recognize(audio_data_to_pcm(audio), audio)["text"]
+
+    audios = [audio for _, audio in commands]
+    print(f"{len(commands)} commands, Whisper '{args.model}' with '{args.language_model}' language ID, "
+          f"median of {args.repeat} runs per command")
+    old = time_calls(google_then_whisper, audios, args.repeat)
+    new = time_calls(local_first, audios, args.repeat)
+    for (name, _), old_ms, new_ms in zip(commands, old, new):
+        print(f"  {name:<32} {old_ms:9.0f} ms -> {new_ms:9.0f} ms")
+    report("Google, then Whisper (old)", old)
+    report("local-first router", new)
+    print(f"{'':<28} speedup {sum(old) / sum(new):.1f}x")
+
+
+# What the model typically sends use_calculator for a spoken question
+CALCULATOR_INPUTS = [
+    "2*3+4", "128/4", "1250*0.15", "3.5*12", "2^10", "sqrt(144)", "(17+23)*4/5", "100/7",
+    "19.99*3", "sin(pi/6)", "log(1000, 10)", "72 * 1.8 + 32", "2*x+3=11", "x**2=16",
+]
+
+
+def legacy_calculate(task: str) -> str:
+    """use_calculator before the math engine: SymPy parses and evaluates every call."""
+    import sympy as smpy
+
+    if '=' in task:
+        lhs, rhs = task.split('=')
+        lhs_expr = smpy.sympify(lhs)
+        rhs_expr = smpy.sympify(rhs)
+        symbols = lhs_expr.free_symbols.union(rhs_expr.free_symbols)
+        return str(smpy.solve(lhs_expr - rhs_expr, *symbols))
+    return str(smpy.sympify(task).evalf())
+
+
+def benchmark_math(args) -> None:
+    import sympy  # noqa: F401  (imported up front so the first legacy call isn't charged for it)
+    from math_engine import MathEngine
+
+    def cold(task):
+        return MathEngine().evaluate(task)
+
+    warm_engine = MathEngine()
+
+    print(f"{len(CALCULATOR_INPUTS)} calculator inputs, median of {args.repeat} runs per input")
+    old = time_calls(legacy_calculate, CALCULATOR_INPUTS, args.repeat)
+    first = time_calls(cold, CALCULATOR_INPUTS, args.repeat)
+    cached = time_calls(warm_engine.evaluate, CALCULATOR_INPUTS, args.repeat)
+    for task, old_ms, first_ms, cached_ms in zip(CALCULATOR_INPUTS, old, first, cached):
+        print(f"  {task:<16} {legacy_calculate(task):<24} {old_ms:9.3f} ms -> {first_ms:9.3f} ms, "
+              f"cached {cached_ms:9.4f} ms")
+    report("sympify every call (old)", old)
+    report("math engine, first call", first)
+    report("math engine, cached", cached)
+    print(f"{'':<28} speedup {sum(old) / sum(first):.1f}x first call, {sum(old) / sum(cached):.0f}x cached")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    extractor = subparsers.add_parser("extractor", help="fetch_main_content extraction on saved HTML pages")
+    extractor.add_argument("corpus", help="Directory of saved .html pages")
+    extractor.add_argument("--repeat", type=int, default=5)
+    extractor.set_defaults(run=benchmark_extractor)
+
+    recognition = subparsers.add_parser("recognition", help="listen()'s recognition strategies on recorded commands")
+    recognition.add_argument("fixtures", help="Directory of recorded .wav commands")
+    recognition.add_argument("--model", default="small", help="Whisper model that transcribes")
+    recognition.add_argument("--language-model", default="tiny", help="Whisper model that identifies the language")
+    recognition.add_argument("--repeat", type=int, default=1)
+    recognition.set_defaults(run=benchmark_recognition)
+
+    math = subparsers.add_parser("math", help="use_calculator on typical spoken calculations")
+    math.add_argument("--repeat", type=int, default=20)
+    math.set_defaults(run=benchmark_math)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
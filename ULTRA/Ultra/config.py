@@ -3,6 +3,7 @@ from openwakeword.model import Model
 import speech_recognition as sr
 import whisper
 import time
+from speech_engine import TranscriptionEngine, SAMPLE_RATE, audio_data_to_pcm
 from urllib3.exceptions import NotOpenSSLWarning
 import warnings
 
@@ -31,22 +32,26 @@ whisper.load_model("tiny")
 print("[Ultra is Tiny model downloaded successfully...]")
 time.sleep(2)
 
+base_engine = TranscriptionEngine("base")
+tiny_engine = TranscriptionEngine("tiny")
+
+
 def listen():
+    base_engine.load_in_background()
     r = sr.Recognizer()
-    with sr.Microphone() as source:
+    with sr.Microphone(sample_rate=SAMPLE_RATE) as source:
         print("[Ultra is Ready for speech, try saying 'this is a test']")
         audio = r.listen(source)  # Listen until silence is detected
 
-    # Save the captured audio to a WAV file
-    audio_file = "captured_audio.wav"
-    with open(audio_file, "wb") as f:
-        f.write(audio.get_wav_data())
+    pcm = audio_data_to_pcm(audio)
+
+    # Finish loading and warming up before timing, so the budget only covers the decode
+    base_engine.wait_until_ready()
 
     try:
-        # Load the Whisper model
-        model = whisper.load_model("base")  # Start with the base model
+        # Start with the base model
         start_time = time.time()  # Record the start time
-        result = model.transcribe(audio_file)
+        result = base_engine.transcribe(pcm)
         end_time = time.time()  # Record the end time
 
         # Check if the transcription took longer than 3 seconds
@@ -55,8 +60,7 @@ def listen():
 
     except (Exception, TimeoutError) as e:
         print(f"Switching to tiny model due to: {str(e)}")
-        model = whisper.load_model("tiny")  # Fallback to the tiny model
-        result = model.transcribe(audio_file)
+        result = tiny_engine.transcribe(pcm)  # Fallback to the tiny model
 
     return result["text"]
 
@@ -0,0 +1,129 @@
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+CONTENT_TAGS = {'article', 'main', 'section', 'p', 'h1', 'h2', 'h3', 'ul', 'ol'}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head'}
+ANSWER_BOX_CLASS = 'BNeawe iBp4i AP7Wnd'
+DEFAULT_CHARACTER_BUDGET = 3500
+
+
+class ContentCollector:
+    """
+    Collect readable text from parser events in a single pass.
+
+    Text counts once no matter how many content elements it is nested in, so an
+    <article> full of <p>s doesn't repeat every paragraph. Collection stops as
+    soon as the character budget is reached.
+    """
+
+    def __init__(self, budget: int = DEFAULT_CHARACTER_BUDGET):
+        self.budget = budget
+        self.parts: List[str] = []
+        self.answer_parts: List[str] = []
+        self.length = 0
+        self.done = False
+
+        self._open: Dict[str, int] = {}
+        self._content_depth = 0
+        self._skip_depth = 0
+        self._answer_div_depth = 0
+
+    def start(self, tag: str, attrs: Dict[str, str]) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ''
+        if tag == 'div':
+            if self._answer_div_depth:
+                self._answer_div_depth += 1
+            elif attrs.get('class') == ANSWER_BOX_CLASS:
+                self._answer_div_depth = 1
+        if tag in CONTENT_TAGS or tag in SKIP_TAGS:
+            self._open[tag] = self._open.get(tag, 0) + 1
+            if tag in CONTENT_TAGS:
+                self._content_depth += 1
+            else:
+                self._skip_depth += 1
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower() if isinstance(tag, str) else ''
+        if tag == 'div' and self._answer_div_depth:
+            self._answer_div_depth -= 1
+        if self._open.get(tag):
+            self._open[tag] -= 1
+            if tag in CONTENT_TAGS:
+                self._content_depth -= 1
+            else:
+                self._skip_depth -= 1
+
+    def data(self, text: str) -> None:
+        if self._skip_depth:
+            return
+        if self._answer_div_depth:
+            self.answer_parts.append(text)
+        if not self._content_depth:
+            return
+        text = text.strip()
+        if not text:
+            return
+        self.parts.append(text)
+        self.length += len(text) + 1
+        if self.length >= self.budget:
+            self.done = True
+
+    # lxml parser target interface
+    def close(self) -> None:
+        pass
+
+    def result(self) -> str:
+        """Return the collected text, prefixed by the answer box and cut to the budget."""
+        answer = ''.join(self.answer_parts).strip()
+        special_message = f"[This is the most accurate and concise response]: {answer} " if answer else ''
+        main_content = special_message + ' '.join(self.parts)
+        if len(main_content) > self.budget:
+            main_content = main_content[:self.budget - 3] + "..."
+        return main_content
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector: ContentCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict((name, value or '') for name, value in attrs))
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+def make_parser(collector: ContentCollector, use_lxml: bool = True):
+    """Return an incremental parser feeding the collector, backed by lxml when it is installed."""
+    if use_lxml and etree is not None:
+        return etree.HTMLParser(target=collector, recover=True)
+    return _StdlibParser(collector)
+
+
+def extract_main_content(chunks: Iterable[str], budget: int = DEFAULT_CHARACTER_BUDGET, use_lxml: bool = True) -> str:
+    """
+    Extract the readable text of an HTML page from an iterable of decoded text chunks.
+
+    Parsing stops at the first chunk that fills the budget, so the rest of the
+    page isn't parsed (or, with a streamed response, even downloaded).
+    """
+    collector = ContentCollector(budget)
+    parser = make_parser(collector, use_lxml)
+    for chunk in chunks:
+        if not chunk:
+            continue
+        parser.feed(chunk)
+        if collector.done:
+            break
+    else:
+        parser.close()
+    return collector.result()
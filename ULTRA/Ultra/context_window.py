@@ -0,0 +1,213 @@
+import json
+import os
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def load_encoding():
+    """
+    Return the tiktoken encoding, importing tiktoken on first use (the first
+    call may download the BPE file), or None when tiktoken isn't available.
+    """
+    global _encoding, _encoding_loaded
+
+    if _encoding_loaded:
+        return _encoding
+
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception:
+                # tiktoken is optional; fall back to the usual ~4 characters per token estimate
+                _encoding = None
+            _encoding_loaded = True
+        return _encoding
+
+
+@lru_cache(maxsize=4096)
+def count_text_tokens(text: str) -> int:
+    """Count the tokens in a piece of text."""
+    if not text:
+        return 0
+    encoding = load_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def count_message_tokens(message: Dict) -> int:
+    """Count the tokens a chat message costs, including tool calls."""
+    content = message.get("content")
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str) if content else ""
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_text_tokens(content)
+    if message.get("tool_calls"):
+        tokens += count_text_tokens(json.dumps(message["tool_calls"], default=str))
+    return tokens
+
+
+class ContextWindow:
+    """
+    Build the messages for a request within a token budget.
+
+    The system prompt and the question are always sent, and the last
+    keep_last_messages history messages are sent verbatim as far as the budget
+    allows. Older messages are folded into a rolling summary generated on a
+    background thread, so a request never waits for it; until the summary
+    catches up, the older messages are sent as-is if there is room left.
+
+    The summary is extended summarize_batch messages per call, so a long
+    backlog never goes to the model in one prompt, and a failed call is not
+    retried for retry_delay seconds. With a state_path the summary and the
+    number of messages it covers are saved after every call, so a restart
+    carries on from there instead of summarizing the whole history again.
+    """
+
+    def __init__(self, summarize: Callable[[Optional[str], List[Dict]], str], token_budget: int = 6000,
+                 keep_last_messages: int = 8, summarize_batch: int = 8, state_path: Optional[str] = None,
+                 retry_delay: float = 120.0):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.keep_last_messages = keep_last_messages
+        self.summarize_batch = summarize_batch
+        self.state_path = state_path
+        self.retry_delay = retry_delay
+
+        self.summary: Optional[str] = None
+        self.summarized_count = 0  # History messages (after the system prompt) covered by the summary
+        self.last_token_count = 0
+        self.request_token_counts: List[int] = []
+
+        self._summary_lock = threading.Lock()
+        self._summary_thread = None
+        self._retry_at = 0.0
+        self._saved_checksum: Optional[int] = None  # Of the last message the saved summary covers
+        self._load_state()
+
+    def _load_state(self) -> None:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+            self.summary = state["summary"]
+            self.summarized_count = state["summarized_count"]
+            self._saved_checksum = state["checksum"]
+        except (json.JSONDecodeError, OSError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable conversation summary: {e}")
+
+    def _save_state(self, checksum: int) -> None:
+        if not self.state_path:
+            return
+        temp_path = self.state_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({"summary": self.summary, "summarized_count": self.summarized_count,
+                           "checksum": checksum}, file, ensure_ascii=False)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            print(f"Error saving conversation summary: {e}")
+
+    def _check_saved_state(self, turns: List[Dict]) -> None:
+        """Drop a saved summary that doesn't match the history (e.g. the history file was trimmed or replaced)."""
+        with self._summary_lock:
+            if self._saved_checksum is None:
+                return
+            count = self.summarized_count
+            if not (0 < count <= len(turns) and _checksum(turns[count - 1]) == self._saved_checksum):
+                print("The saved conversation summary doesn't match the history, starting a new one.")
+                self.summary = None
+                self.summarized_count = 0
+            self._saved_checksum = None
+
+    def build(self, history: List[Dict], extra_system_messages: List[Dict], question: str) -> List[Dict]:
+        """Return the messages to send for the question and record their token count."""
+        system_messages = history[:1] if history and history[0]['role'] == 'system' else []
+        turns = history[len(system_messages):]
+        self._check_saved_state(turns)
+
+        recent_start = max(0, len(turns) - self.keep_last_messages)
+        recent = turns[recent_start:]
+        with self._summary_lock:
+            summary = self.summary
+            summarized_count = min(self.summarized_count, recent_start)
+        unsummarized = turns[summarized_count:recent_start]
+
+        summary_messages = []
+        if summary:
+            summary_messages.append({"role": "system", "content": f"Summary of the earlier conversation: {summary}"})
+
+        question_message = {"role": "user", "content": question}
+        fixed_tokens = sum(count_message_tokens(m) for m in system_messages + summary_messages + [question_message])
+
+        # Spend what's left of the budget newest-first: recent turns, then memories,
+        # then older turns the summary doesn't cover yet.
+        remaining = self.token_budget - fixed_tokens
+        kept_recent = _take_newest(recent, remaining)
+        remaining -= sum(count_message_tokens(m) for m in kept_recent)
+        kept_extra = _take_newest(extra_system_messages, remaining)
+        remaining -= sum(count_message_tokens(m) for m in kept_extra)
+        kept_unsummarized = _take_newest(unsummarized, remaining)
+
+        messages = system_messages + summary_messages + kept_unsummarized + kept_recent + kept_extra + [question_message]
+
+        self.last_token_count = sum(count_message_tokens(m) for m in messages)
+        self.request_token_counts.append(self.last_token_count)
+        print(f"Prompt tokens: {self.last_token_count} (budget {self.token_budget})")
+
+        if recent_start - summarized_count >= self.summarize_batch and time.monotonic() >= self._retry_at:
+            self._refresh_summary_in_background(turns[:recent_start])
+        return messages
+
+    def _refresh_summary_in_background(self, older_turns: List[Dict]) -> None:
+        if self._summary_thread is not None and self._summary_thread.is_alive():
+            return
+        self._summary_thread = threading.Thread(target=self._refresh_summary, args=(list(older_turns),), daemon=True)
+        self._summary_thread.start()
+
+    def _refresh_summary(self, older_turns: List[Dict]) -> None:
+        while True:
+            with self._summary_lock:
+                previous_summary = self.summary
+                start = self.summarized_count
+            batch = older_turns[start:start + self.summarize_batch]
+            if not batch:
+                return
+            try:
+                summary = self.summarize(previous_summary, batch)
+            except Exception as e:
+                print(f"Failed to summarize conversation history: {e}")
+                self._retry_at = time.monotonic() + self.retry_delay
+                return
+            with self._summary_lock:
+                self.summary = summary
+                self.summarized_count = start + len(batch)
+                self._save_state(_checksum(batch[-1]))
+
+
+def _checksum(message: Dict) -> int:
+    return zlib.crc32(json.dumps(message, sort_keys=True, default=str).encode('utf-8'))
+
+
+def _take_newest(messages: List[Dict], token_limit: int) -> List[Dict]:
+    """Return the longest suffix of messages that fits in token_limit."""
+    kept = []
+    for message in reversed(messages):
+        tokens = count_message_tokens(message)
+        if tokens > token_limit:
+            break
+        token_limit -= tokens
+        kept.append(message)
+    kept.reverse()
+    return kept
@@ -0,0 +1,106 @@
+import queue
+import threading
+from typing import Optional
+
+from spotify_state import SpotifyStateService
+
+
+class DuckingController:
+    """
+    Pause and lower Spotify while Ultra handles a turn, and put it back after.
+
+    duck() and restore() only queue a command and return, so they never hold
+    up listening or speech; a worker thread does the Spotify I/O in order.
+    Everything the restore depends on lives in this object behind one lock:
+
+    - Turns nest. Only the first duck() records the volume and whether music
+      was playing, and only the matching last restore() puts them back, so a
+      turn that barges in on another can't record the ducked volume as the
+      one to restore.
+    - A volume the user asks for during a turn replaces the recorded one.
+    - If the user paused the music during a turn it stays paused afterwards,
+      until they resume it (or start it themselves).
+    """
+
+    def __init__(self, state: SpotifyStateService, duck_ratio: float = 0.6):
+        self.state = state
+        self.duck_ratio = duck_ratio
+
+        self._lock = threading.Lock()
+        self._depth = 0
+        self._was_playing = False
+        self._restore_volume: Optional[int] = None
+        self._user_paused = False
+
+        self._commands = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, daemon=True, name="ultra-ducking")
+        self._thread.start()
+
+    def duck(self) -> None:
+        self._commands.put(self._duck)
+
+    def restore(self) -> None:
+        self._commands.put(self._restore)
+
+    def user_paused(self) -> None:
+        """The user paused the music themselves; don't resume it at restore."""
+        with self._lock:
+            self._user_paused = True
+            self._was_playing = False
+
+    def user_resumed(self) -> None:
+        with self._lock:
+            self._user_paused = False
+            self._was_playing = True
+
+    def user_set_volume(self, volume_percent: int) -> None:
+        """The user chose a volume; restore to that instead of the one recorded at duck()."""
+        with self._lock:
+            self._restore_volume = volume_percent
+
+    @property
+    def restore_volume(self) -> Optional[int]:
+        with self._lock:
+            return self._restore_volume
+
+    def _worker(self) -> None:
+        while True:
+            command = self._commands.get()
+            try:
+                command()
+            except Exception as e:
+                print(f"Error controlling Spotify playback: {e}")
+
+    def _duck(self) -> None:
+        with self._lock:
+            self._depth += 1
+            if self._depth > 1:
+                return  # Already ducked by the turn this one interrupted
+
+        snapshot = self.state.snapshot()
+        with self._lock:
+            self._was_playing = bool(snapshot and snapshot["is_playing"])
+            self._restore_volume = snapshot["volume"] if snapshot else None
+            if self._was_playing:
+                self._user_paused = False  # Playing again, so the user resumed it outside Ultra
+            was_playing, volume = self._was_playing, self._restore_volume
+
+        if was_playing:
+            self.state.pause()
+        if volume is not None:
+            self.state.set_volume(int(volume * self.duck_ratio))
+
+    def _restore(self) -> None:
+        with self._lock:
+            if self._depth == 0:
+                return
+            self._depth -= 1
+            if self._depth > 0:
+                return
+            resume = self._was_playing and not self._user_paused
+            volume = self._restore_volume
+
+        if volume is not None:
+            self.state.set_volume(volume)
+        if resume and not self.state.is_playing():
+            self.state.resume()
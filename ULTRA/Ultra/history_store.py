@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+
+def serialize_object(obj):
+    """Converts a custom object to a dictionary."""
+    if hasattr(obj, '__dict__'):
+        # For general objects, convert their __dict__ property
+        return {key: serialize_object(value) for key, value in obj.__dict__.items()}
+    elif isinstance(obj, list):
+        return [serialize_object(item) for item in obj]
+    elif isinstance(obj, dict):
+        return {key: serialize_object(value) for key, value in obj.items()}
+    else:
+        # If it's already a serializable type, return it as is
+        return obj
+
+
+class ConversationHistoryStore:
+    """
+    Conversation history kept in memory and persisted as an append-only JSON Lines file.
+
+    Each new message is written as one line and fsync'ed, so a turn costs one small
+    write instead of re-serializing the whole conversation. A torn last line from a
+    crash is skipped on load. Every compact_every appends the file is rewritten from
+    memory through a temporary file and an atomic rename.
+    """
+
+    def __init__(self, file_path: str = "conversation_history.jsonl", legacy_file_path: Optional[str] = None,
+                 compact_every: int = 200, max_messages: Optional[int] = None):
+        self.file_path = file_path
+        self.legacy_file_path = legacy_file_path
+        self.compact_every = compact_every
+        self.max_messages = max_messages
+        self.messages: List[Dict] = []
+
+        self._loaded = False
+        self._appends_since_compaction = 0
+        self._lock = threading.RLock()
+
+    def load(self) -> List[Dict]:
+        """Read the history from disk the first time it is needed and return the in-memory list."""
+        with self._lock:
+            if self._loaded:
+                return self.messages
+            self._loaded = True
+
+            if os.path.exists(self.file_path):
+                needs_compaction = False
+                with open(self.file_path, 'r', encoding='utf-8') as file:
+                    for line in file:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            self.messages.append(json.loads(line))
+                        except json.JSONDecodeError:
+                            needs_compaction = True
+                if needs_compaction:
+                    print("Skipped a damaged line in the conversation history, compacting it.")
+                    self.compact()
+            elif self.legacy_file_path and os.path.exists(self.legacy_file_path):
+                try:
+                    with open(self.legacy_file_path, 'r') as file:
+                        self.messages = json.load(file)
+                except json.JSONDecodeError:
+                    self.messages = []
+                self.compact()
+
+            return self.messages
+
+    def set_system_prompt(self, system_prompt: str) -> None:
+        """Make sure the history starts with the current system prompt."""
+        with self._lock:
+            self.load()
+            if self.messages and self.messages[0]['role'] == 'system':
+                # Only the in-memory copy changes; the stored prompt is replaced
+                # on every start anyway, so the file catches up at compaction.
+                self.messages[0]['content'] = system_prompt
+            else:
+                self.messages.insert(0, {"role": "system", "content": system_prompt})
+                self.compact()
+
+    def append(self, *messages) -> None:
+        """Add messages to memory and durably append them to the file."""
+        with self._lock:
+            self.load()
+            serialized = [serialize_object(message) for message in messages]
+            self.messages.extend(serialized)
+
+            with open(self.file_path, 'a', encoding='utf-8') as file:
+                for message in serialized:
+                    file.write(json.dumps(message, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+            self._appends_since_compaction += len(serialized)
+            if self._appends_since_compaction >= self.compact_every:
+                self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the file from memory, dropping damaged lines and trimming old messages."""
+        with self._lock:
+            if self.max_messages and len(self.messages) > self.max_messages:
+                system_messages = self.messages[:1] if self.messages and self.messages[0]['role'] == 'system' else []
+                keep = self.max_messages - len(system_messages)
+                self.messages[:] = system_messages + self.messages[len(self.messages) - keep:]
+
+            temp_path = self.file_path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for message in self.messages:
+                    file.write(json.dumps(message, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.file_path)
+            self._appends_since_compaction = 0
@@ -0,0 +1,64 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+MAX_CONNECTIONS_PER_HOST = 8
+
+try:
+    import brotli  # noqa: F401  urllib3 decodes "br" responses when this is installed
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+class PooledSession(requests.Session):
+    """
+    A requests session with keep-alive connection pools, retries with backoff
+    and a default timeout for every request that doesn't set its own.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries: int = 2, backoff_factor: float = 0.3,
+                 max_connections_per_host: int = MAX_CONNECTIONS_PER_HOST):
+        super().__init__()
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        # pool_block keeps the number of open connections per host at the limit;
+        # extra requests wait for a free connection instead of opening new ones.
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_connections_per_host,
+                              max_retries=retry, pool_block=True)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.headers["Accept-Encoding"] = ACCEPT_ENCODING
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+
+def get_session(retries: int = 2) -> PooledSession:
+    """
+    Return the session shared by every network-facing tool. Calls that run
+    against a deadline ask for retries=0, which gets a second shared session
+    whose requests fail fast instead of backing off and retrying.
+    """
+    with _session_lock:
+        if retries not in _sessions:
+            _sessions[retries] = PooledSession(retries=retries)
+        return _sessions[retries]
@@ -1,20 +1,60 @@
 
-import openai
+from startup_profile import import_timer, import_report_requested, seconds_since_start
+if import_report_requested():
+    import_timer.install()
+
 from apikey import weather_api_key, DEFAULT_LOCATION, UNIT, spotify_client_id, spotify_client_secret
 from datetime import datetime
-import sympy as smpy
 from urllib3.exceptions import NotOpenSSLWarning
-import keyboard
 import sys
 from app_paths import APP_PATHS
 from app_subsets import AppSubsetManager
+from speech_engine import TranscriptionEngine, SAMPLE_RATE, audio_data_to_pcm, save_debug_audio
+from speech_router import RecognitionRouter
+from speech_pipeline import SentenceSpeaker
+from tool_executor import ToolExecutor
+from history_store import ConversationHistoryStore
+from context_window import ContextWindow, load_encoding
+from memory_store import MemoryStore
+from tool_registry import ToolRegistry
+from http_client import get_session
+from weather_cache import WeatherCache
+from content_extractor import extract_main_content
+from web_cache import WebContentCache
+from tts_cache import SpeechCache
+from audio_playback import AudioScheduler, TTS_SAMPLE_RATE, TTS_SAMPLE_WIDTH, TTS_CHANNELS
+from microphone import MicrophoneStream
+from wake_word import WakeWordDetector
+from vad import Endpointer
+from tracing import get_tracer
+from spotify_state import SpotifyStateService
+from ducking import DuckingController
+from math_engine import MathEngine
 sys.stdout.reconfigure(encoding='utf-8')
 import warnings
 warnings.simplefilter(action='ignore', category=FutureWarning)
 import json
+import threading
 print('Loading...')
 
-app_subset_manager = AppSubsetManager()
+app_subset_manager = None
+app_subset_manager_lock = threading.Lock()
+tool_registry = ToolRegistry('tools.json')
+
+
+def get_app_subset_manager():
+    """Return the app subset manager, reading its config on first use."""
+    global app_subset_manager
+
+    if app_subset_manager:
+        return app_subset_manager
+
+    with app_subset_manager_lock:
+        if app_subset_manager:  # Built by another thread while this one waited
+            return app_subset_manager
+
+        app_subset_manager = AppSubsetManager()
+        return app_subset_manager
 
 
 def expand_path(path):
@@ -48,51 +88,65 @@ def find_executable_path(app_name):
     return None
 
 
+@tool_registry.register()
 def control_pc(action, delay=0):
     """
     Control PC operations like restart, shutdown, sleep, or lock.
+
+    A delayed action is scheduled on a timer and the tool returns at once, so
+    it doesn't hold up the turn (or the serial tool worker) while it waits.
     """
     print(f"[Ultra is preparing to {action} the PC...]")
 
-    if delay > 0:
-        time.sleep(delay)
-
     system = platform.system().lower()
+    commands = {}
+    if system == 'windows':
+        commands = {
+            "restart": ["shutdown", "/r", "/t", "0"],
+            "shutdown": ["shutdown", "/s", "/t", "0"],
+            "sleep": ["rundll32.exe", "powrprof.dll,SetSuspendState", "0,1,0"],
+            "lock": ["rundll32.exe", "user32.dll,LockWorkStation"]
+        }
+    elif system == 'darwin':  # macOS
+        commands = {
+            "restart": ["sudo", "shutdown", "-r", "now"],
+            "shutdown": ["sudo", "shutdown", "-h", "now"],
+            "sleep": ["pmset", "sleepnow"],
+            "lock": ["login", "-f", "root",
+                     "/System/Library/CoreServices/Menu Extras/User.menu/Contents/Resources/CGSession", "-suspend"]
+        }
+    elif system == 'linux':
+        commands = {
+            "restart": ["sudo", "shutdown", "-r", "now"],
+            "shutdown": ["sudo", "shutdown", "-h", "now"],
+            "sleep": ["systemctl", "suspend"],
+            "lock": ["loginctl", "lock-session"]
+        }
 
-    try:
-        if system == 'windows':
-            commands = {
-                "restart": ["shutdown", "/r", "/t", "0"],
-                "shutdown": ["shutdown", "/s", "/t", "0"],
-                "sleep": ["rundll32.exe", "powrprof.dll,SetSuspendState", "0,1,0"],
-                "lock": ["rundll32.exe", "user32.dll,LockWorkStation"]
-            }
-        elif system == 'darwin':  # macOS
-            commands = {
-                "restart": ["sudo", "shutdown", "-r", "now"],
-                "shutdown": ["sudo", "shutdown", "-h", "now"],
-                "sleep": ["pmset", "sleepnow"],
-                "lock": ["login", "-f", "root",
-                         "/System/Library/CoreServices/Menu Extras/User.menu/Contents/Resources/CGSession", "-suspend"]
-            }
-        elif system == 'linux':
-            commands = {
-                "restart": ["sudo", "shutdown", "-r", "now"],
-                "shutdown": ["sudo", "shutdown", "-h", "now"],
-                "sleep": ["systemctl", "suspend"],
-                "lock": ["loginctl", "lock-session"]
-            }
-
-        if action in commands:
-            subprocess.run(commands[action], check=True)
-            return json.dumps({
-                "PC Control Success": f"Successfully initiated {action} command"
-            })
-        else:
-            return json.dumps({
-                "PC Control Error": f"Unknown action: {action}"
-            })
+    if action not in commands:
+        return json.dumps({
+            "PC Control Error": f"Unknown action: {action}"
+        })
+
+    if delay and delay > 0:
+        def run_delayed():
+            try:
+                subprocess.run(commands[action], check=True)
+            except Exception as e:
+                print(f"Error during delayed {action}: {e}")
 
+        timer = threading.Timer(delay, run_delayed)
+        timer.daemon = True  # Closing Ultra before the delay is up cancels the action
+        timer.start()
+        return json.dumps({
+            "PC Control Success": f"Scheduled {action} in {delay:g} seconds"
+        })
+
+    try:
+        subprocess.run(commands[action], check=True)
+        return json.dumps({
+            "PC Control Success": f"Successfully initiated {action} command"
+        })
     except subprocess.CalledProcessError as e:
         return json.dumps({
             "PC Control Error": f"Error during {action}: {str(e)}"
@@ -103,6 +157,7 @@ def control_pc(action, delay=0):
         })
 
 
+@tool_registry.register()
 def open_application(app_name: str, arguments: str = "") -> str:
     """
     Open a Windows application using PowerShell Start-FromWinStartMenuApp function.
@@ -158,6 +213,7 @@ def open_application(app_name: str, arguments: str = "") -> str:
             "no_speak": True
         })
 
+@tool_registry.register()
 def manage_app_subset(action: str, subset_name: str, modification_type: str = None, apps: list[str] = None) -> str:
     """
     Manage application subsets (create, modify, delete, list, or open them).
@@ -166,26 +222,26 @@ def manage_app_subset(action: str, subset_name: str, modification_type: str = No
 
     try:
         if action == "create" and apps:
-            result = app_subset_manager.create_subset(subset_name, apps)
+            result = get_app_subset_manager().create_subset(subset_name, apps)
             return json.dumps(result)
 
         elif action == "delete":
-            result = app_subset_manager.delete_subset(subset_name)
+            result = get_app_subset_manager().delete_subset(subset_name)
             return json.dumps(result)
 
         elif action == "modify" and modification_type and apps:
-            result = app_subset_manager.modify_subset(subset_name, modification_type, apps)
+            result = get_app_subset_manager().modify_subset(subset_name, modification_type, apps)
             return json.dumps(result)
 
         elif action == "list":
-            subsets = app_subset_manager.list_subsets()
+            subsets = get_app_subset_manager().list_subsets()
             return json.dumps({
                 "status": "success",
                 "subsets": subsets
             })
 
         elif action == "open":
-            apps_to_open = app_subset_manager.get_subset_apps(subset_name)
+            apps_to_open = get_app_subset_manager().get_subset_apps(subset_name)
             if not apps_to_open:
                 return json.dumps({
                     "status": "error",
@@ -221,6 +277,7 @@ def manage_app_subset(action: str, subset_name: str, modification_type: str = No
         })
 
 
+@tool_registry.register()
 def open_browser(url, browser="default"):
     """
     Open a URL in the default web browser or a specific browser.
@@ -251,15 +308,8 @@ def open_browser(url, browser="default"):
 
 
 
-was_spotify_playing = False
-original_volume = None
-user_requested_pause = False
-
-def get_current_weather(location=None, unit=UNIT):
-    print(" ")
-    """Get the current weather in a given location and detailed forecast"""
-    if location is None:
-        location = DEFAULT_LOCATION
+def fetch_weather_forecast(location):
+    """Fetch today's forecast payload from weatherapi.com, raising if it is unusable."""
     API_KEY = weather_api_key
     base_url = "http://api.weatherapi.com/v1/forecast.json"
     params = {
@@ -267,11 +317,48 @@ def get_current_weather(location=None, unit=UNIT):
         "q": location,
         "days": 1
     }
-    
-    response = requests.get(base_url, params=params)
+
+    response = get_session().get(base_url, params=params)
     data = response.json()
+    if response.status_code != 200 or 'current' not in data or 'forecast' not in data or not data['forecast']['forecastday']:
+        raise ValueError(f"Unexpected weather response ({response.status_code})")
+    return data
+
+weather_cache_ttl = 300  # Seconds a forecast is served without asking weatherapi.com again
+weather_cache = None
+weather_cache_lock = threading.Lock()
+
+def get_weather_cache():
+    """Return the weather cache, loading any forecasts saved by the last run."""
+    global weather_cache
+
+    if weather_cache:
+        return weather_cache
+
+    with weather_cache_lock:
+        if weather_cache:
+            return weather_cache
+
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        weather_cache = WeatherCache(fetch_weather_forecast, ttl=weather_cache_ttl,
+                                     cache_path=os.path.join(current_dir, "weather_cache.json"))
+        return weather_cache
+
+@tool_registry.register()
+def get_current_weather(location=None, unit=UNIT):
+    print(" ")
+    """Get the current weather in a given location and detailed forecast"""
+    if location is None:
+        location = DEFAULT_LOCATION
+
+    # One cached forecast payload serves the current conditions, min/max and astro fields
+    try:
+        data = get_weather_cache().get(location)
+    except (requests.RequestException, ValueError, KeyError) as e:
+        print(f"Error fetching weather: {str(e)}")
+        data = None
 
-    if response.status_code == 200 and 'current' in data and 'forecast' in data and data['forecast']['forecastday']:
+    if data:
         weather_info = {
         "location": location,
         "temperature": data["current"]["temp_f"],
@@ -301,6 +388,9 @@ def get_current_weather(location=None, unit=UNIT):
     print(f"[Ultra is finding the current weather in {location}...]")
     return json.dumps(weather_info)
     
+math_engine = MathEngine()
+
+@tool_registry.register("use_calculator")
 def perform_math(input_string):
     print("[Ultra is calculating math...]")
     print(" ")
@@ -310,24 +400,7 @@ def perform_math(input_string):
 
     for task in tasks:
         try:
-            # Check if the task is an equation (contains '=')
-            if '=' in task:
-                # Split the equation into lhs and rhs
-                lhs, rhs = task.split('=')
-                lhs_expr = smpy.sympify(lhs)
-                rhs_expr = smpy.sympify(rhs)
-
-                # Identify all symbols (variables) in the equation
-                symbols = lhs_expr.free_symbols.union(rhs_expr.free_symbols)
-
-                # Solve the equation
-                # For multiple symbols, solve() returns a list of solution dictionaries
-                result = smpy.solve(lhs_expr - rhs_expr, *symbols)
-            else:
-                # If not an equation, directly evaluate the expression
-                expression = smpy.sympify(task)
-                result = expression.evalf()
-
+            result = math_engine.evaluate(task)
             responses.append(f"Result of '{task}' is {result}.")
 
         except Exception as e:
@@ -336,66 +409,49 @@ def perform_math(input_string):
     final_response = note + " ".join(responses)
     return json.dumps({"Math Result": final_response})
 
-memory_file_path = None
+memory_store = None
+memory_store_lock = threading.Lock()
 
-def get_memory_file_path():
-    """Return the full path to the memory.txt file. Create the file if it doesn't exist."""
-    global memory_file_path
+def get_memory_store():
+    """Return the memory store next to this script, opening it on first use."""
+    global memory_store
 
-    if memory_file_path:
-        return memory_file_path
+    if memory_store:
+        return memory_store
 
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    memory_file_path = os.path.join(current_dir, "memory.txt")
+    with memory_store_lock:
+        if memory_store:
+            return memory_store
 
-    if not os.path.exists(memory_file_path):
-        with open(memory_file_path, 'w') as file:
-            json.dump([], file)
-
-    return memory_file_path
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        memory_store = MemoryStore(os.path.join(current_dir, "memory.db"),
+                                   legacy_file_path=os.path.join(current_dir, "memory.txt"))
+        return memory_store
 
+@tool_registry.register("personal_memory")
 def memorize(operation, data=None):
     """Store, retrieve, or clear data in your memory."""
-    file_path = get_memory_file_path()
+    store = get_memory_store()
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    try:
-        with open(file_path, 'r') as file:
-            memory = json.load(file)
-    except (json.JSONDecodeError, FileNotFoundError):
-        memory = []
-
     if operation == "store" and data is not None:
         print("[Ultra is storing memory data...]")
-        memory.append({
-            "data": data,
-            "store_time": current_time,
-            "retrieve_time": None
-        })
+        store.store(data, current_time)
+        return json.dumps({"Memory Message for Success": f"Data stored successfully on {current_time}"})
 
     elif operation == "retrieve":
         print("[Ultra is retrieving memory data...]")
-        if not memory:
+        retrieved_data = store.retrieve_all(current_time)
+        if not retrieved_data:
             return json.dumps({"Memory Message for No Data": "No data stored yet"})
-
-        for item in memory:
-            item["retrieve_time"] = current_time
-
-        retrieved_data = [{"data": item["data"], "store_time": item["store_time"], "retrieve_time": current_time} for item in memory]
         return json.dumps({"Memory Message for Retrieved Data": f"Data retrieved on {current_time}", "data": retrieved_data})
 
     elif operation == "clear":
         print("[Ultra is clearing memory data...]")
-        memory = []
-
-    with open(file_path, 'w') as file:
-        json.dump(memory, file)
-
-    if operation == "store":
-        return json.dumps({"Memory Message for Success": f"Data stored successfully on {current_time}"})
-    elif operation == "clear":
+        store.clear()
         return json.dumps({"Memory Message for Erase": "Memory cleared successfully"})
 
+@tool_registry.register()
 def get_current_datetime(mode="date & time"):
     """Get the current date and/or time"""
     now = datetime.now()
@@ -418,22 +474,77 @@ def get_current_datetime(mode="date & time"):
     # Return the datetime response as a JSON string
     return json.dumps({"Datetime Response": datetime_response})
 
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
+spotify_client = None
+spotify_client_lock = threading.Lock()
+
+def get_spotify():
+    """Return the Spotify client, importing spotipy and setting up OAuth on first use."""
+    global spotify_client
+
+    if spotify_client:
+        return spotify_client
+
+    with spotify_client_lock:
+        if spotify_client:
+            return spotify_client
+
+        import spotipy
+        from spotipy.oauth2 import SpotifyOAuth
+
+        spotify_client = spotipy.Spotify(auth_manager=SpotifyOAuth(client_id=spotify_client_id,
+                                                   client_secret=spotify_client_secret,
+                                                   redirect_uri="http://localhost:8080/callback",
+                                                   scope = "user-library-read user-modify-playback-state user-read-playback-state user-read-currently-playing user-read-playback-position user-read-private user-read-email"))
+        return spotify_client
+
+spotify_state_ttl = 3.0  # Seconds a playback snapshot is reused before asking the Web API again
+spotify_state = None
+spotify_state_lock = threading.Lock()
+
+def get_spotify_state():
+    """Return the shared Spotify playback state; every playback and volume change goes through it."""
+    global spotify_state
+
+    if spotify_state:
+        return spotify_state
+
+    with spotify_state_lock:
+        if spotify_state:
+            return spotify_state
+
+        spotify_state = SpotifyStateService(get_spotify, ttl=spotify_state_ttl)
+        return spotify_state
+
+spotify_duck_ratio = 0.6  # Spotify plays at this fraction of its volume while Ultra listens and speaks
+ducking_controller = None
+ducking_controller_lock = threading.Lock()
 
-sp = spotipy.Spotify(auth_manager=SpotifyOAuth(client_id=spotify_client_id,
-                                               client_secret=spotify_client_secret,
-                                               redirect_uri="http://localhost:8080/callback",
-                                               scope = "user-library-read user-modify-playback-state user-read-playback-state user-read-currently-playing user-read-playback-position user-read-private user-read-email"))
+def get_ducking_controller():
+    """Return the controller that lowers Spotify during a turn and restores it afterwards."""
+    global ducking_controller
 
+    if ducking_controller:
+        return ducking_controller
+
+    with ducking_controller_lock:
+        if ducking_controller:
+            return ducking_controller
+
+        ducking_controller = DuckingController(get_spotify_state(), duck_ratio=spotify_duck_ratio)
+        return ducking_controller
+
+@tool_registry.register()
 def search_and_play_song(song_name: str):
+    import spotipy
+
     print(f"[Ultra is searching for '{song_name}' on Spotify...]")
+    sp = get_spotify()
     results = sp.search(q=song_name, limit=1)
     if results and results['tracks'] and results['tracks']['items']:
         song_uri = results['tracks']['items'][0]['uri']
         song_name = results['tracks']['items'][0]['name']
         try:
-            sp.start_playback(uris=[song_uri])
+            get_spotify_state().play([song_uri])
             response = json.dumps({
                 "Spotify Success Message": f"Tell the user 'The song \"{song_name}\" is now playing.' If you have anything else to say, be very concise."
             }, indent=4)
@@ -451,41 +562,43 @@ def search_and_play_song(song_name: str):
     
 current_model = "gpt-4o-mini"
 
+# Fixed lines toggle_spotify_playback makes Ultra say; their speech is pre-warmed at startup
+PAUSED_PHRASE = "Okay, it's paused."
+UNPAUSED_PHRASE = "Okay, it's unpaused."
+PAUSED_SONG_PHRASE = "Okay, I paused the song."
+UNPAUSED_SONG_PHRASE = "Okay, I unpaused the song."
+CANNED_PHRASES = [PAUSED_PHRASE, UNPAUSED_PHRASE, PAUSED_SONG_PHRASE, UNPAUSED_SONG_PHRASE]
+
+@tool_registry.register()
 def toggle_spotify_playback(action):
-    global was_spotify_playing, user_requested_pause
     print(f"[Ultra is updating Spotify playback...]")
     try:
-        current_playback = sp.current_playback()
+        state = get_spotify_state()
+        ducking = get_ducking_controller()
+        current_playback = state.snapshot()
 
         if action == "pause":
-            user_requested_pause = True
+            # Spotify is normally already paused for the turn; this keeps it paused afterwards
+            ducking.user_paused()
             if current_playback and current_playback['is_playing']:
-                sp.pause_playback()
-                was_spotify_playing = True
-                set_spotify_volume(original_volume)
-                return json.dumps({"Success Message": "Say: Okay, it's paused."})
-            else:
-                set_spotify_volume(original_volume)
-                was_spotify_playing = False
-                return json.dumps({"Success Message": "Say: Okay, it's paused."})
+                state.pause()
+            return json.dumps({"Success Message": f"Say: {PAUSED_PHRASE}"})
 
         elif action == "unpause":
-            user_requested_pause = False
+            ducking.user_resumed()
             if current_playback and not current_playback['is_playing']:
-                sp.start_playback()
-                return json.dumps({"Success Message": "Say: Okay, it's unpaused."})
-            else:
-                return json.dumps({"Success Message": "Say: Okay, it's unpaused."})
+                state.resume()
+            return json.dumps({"Success Message": f"Say: {UNPAUSED_PHRASE}"})
 
         elif action == "toggle":
             if current_playback and current_playback['is_playing']:
-                sp.pause_playback()
-                was_spotify_playing = False
-                return json.dumps({"Success Message": "Say: Okay, I paused the song."})
+                state.pause()
+                ducking.user_paused()
+                return json.dumps({"Success Message": f"Say: {PAUSED_SONG_PHRASE}"})
             else:
-                sp.start_playback()
-                was_spotify_playing = True
-                return json.dumps({"Success Message": "Say: Okay, I unpaused the song."})
+                state.resume()
+                ducking.user_resumed()
+                return json.dumps({"Success Message": f"Say: {UNPAUSED_SONG_PHRASE}"})
 
         else:
             return json.dumps({"Invalid Action Message": "Invalid action specified"})
@@ -494,20 +607,14 @@ def toggle_spotify_playback(action):
         return json.dumps({"Error Message": str(e)})
 
 
+@tool_registry.register()
 def set_spotify_volume(volume_percent):
-    global was_spotify_playing, original_volume, user_requested_pause
-    original_volume = volume_percent
+    get_ducking_controller().user_set_volume(volume_percent)  # Kept when the turn ends, not the pre-turn volume
     print(f"[Ultra is changing Spotify volume to {volume_percent}%...]")
     try:
-        sp.volume(volume_percent)
-        return json.dumps({"Spotify Volume Success Message": f"Spotify volume set to {volume_percent}%"})
-    except Exception as e:
-        return json.dumps({"Spotify Volume Error Message": str(e)})
-
-def set_spotify_volume2(volume_percent):
-    print(f"[Ultra is changing Spotify volume to {volume_percent}%...]")
-    try:
-        sp.volume(volume_percent)
+        state = get_spotify_state()
+        state.set_volume(volume_percent)
+        state.flush_volume()  # The user asked for this one, so it lands before Ultra answers
         return json.dumps({"Spotify Volume Success Message": f"Spotify volume set to {volume_percent}%"})
     except Exception as e:
         return json.dumps({"Spotify Volume Error Message": str(e)})
@@ -523,6 +630,7 @@ WINMM.waveOutGetVolume.argtypes = [wintypes.HANDLE, POINTER(wintypes.DWORD)]
 WINMM.waveOutSetVolume.argtypes = [wintypes.HANDLE, wintypes.DWORD]
 
 
+@tool_registry.register()
 def set_system_volume(volume_level):
     """
     Set the system volume using Windows API.
@@ -579,101 +687,167 @@ def get_system_volume():
         return None
 
 import webbrowser
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, wait
+
+web_cache = None
+web_cache_lock = threading.Lock()
+
+def get_web_cache():
+    """Return the page and search results cache next to this script, opening it on first use."""
+    global web_cache
 
-def fetch_main_content(url):
+    if web_cache:
+        return web_cache
+
+    with web_cache_lock:
+        if web_cache:
+            return web_cache
+
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        web_cache = WebContentCache(os.path.join(current_dir, "web_cache.db"))
+        return web_cache
+
+def fetch_main_content(url, deadline=None):
+    """
+    Return the main text of a page, from the cache when it is fresh.
+
+    With a deadline (a time.monotonic() value) the request gets the time that
+    is left as its timeout and is not retried, and the download stops at the
+    deadline, so a late page doesn't hold a search worker after its search
+    has answered.
+    """
     print(f"[Ultra is browsing {url} for more info...]")
+    cache = get_web_cache()
+    cached = cache.get_page(url)
+    if cached and cached["fresh"]:
+        cache.record_hit(cached)
+        print(f"Web cache hit for {url} ({cache.describe_stats()})")
+        return cached["content"]
+
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/74.0.3729.169 Safari/537.36'
+    }
+    headers.update(cache.conditional_headers(cached))
+    session, request_options = get_session(), {}
+    if deadline is not None:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return "Page did not load in time."
+        session = get_session(retries=0)
+        request_options["timeout"] = (min(3.05, remaining), remaining)  # (connect, read)
     try:
-        response = requests.get(url, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/74.0.3729.169 Safari/537.36'
-        })
+        response = session.get(url, stream=True, headers=headers, **request_options)
+        if response.status_code == 304 and cached:
+            response.close()
+            cache.record_revalidated(url, cached)
+            print(f"Web cache revalidated {url} ({cache.describe_stats()})")
+            return cached["content"]
         if response.status_code != 200:
+            response.close()
             return "Failed to fetch content due to non-200 status code."
     except Exception as e:
         return f"Error making request: {str(e)}"
 
     try:
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        special_div = soup.find('div', class_='BNeawe iBp4i AP7Wnd')
-        special_message = ''
-        if special_div and special_div.get_text(strip=True):
-            special_message = f"[This is the most accurate and concise response]: {special_div.get_text()} "
-
-        content_selectors = ['article', 'main', 'section', 'p', 'h1', 'h2', 'h3', 'ul', 'ol']
-        content_elements = [special_message]
+        timed_out = False
+
+        def chunks_until_deadline():
+            nonlocal timed_out
+            for chunk in response.iter_content(chunk_size=16384, decode_unicode=True):
+                if deadline is not None and time.monotonic() >= deadline:
+                    timed_out = True
+                    return
+                yield chunk
+
+        # Parse the page as it downloads and stop once there's enough text
+        with response:
+            response.encoding = response.encoding or 'utf-8'
+            main_content = extract_main_content(chunks_until_deadline(), budget=3500)
+            download_bytes = response.raw.tell()
+
+        if timed_out:
+            # Incomplete, so it isn't cached
+            return main_content if main_content else "Page did not load in time."
+        if main_content:
+            cache.put_page(url, main_content, response.headers.get('ETag'), response.headers.get('Last-Modified'),
+                           download_bytes)
+        return main_content if main_content else "Main content not found or could not be extracted."
+    except Exception as e:
+        return f"Error processing content: {str(e)}"
 
-        for selector in content_selectors:
-            for element in soup.find_all(selector):
-                text = element.get_text(separator=' ', strip=True)
-                if text:
-                    content_elements.append(text)
+def get_google_direct_answer(soup):
+    """Return the text of Google's answer box from a parsed results page, if there is one."""
+    answer_box = soup.find('div', class_="BNeawe iBp4i AP7Wnd")
+    if answer_box:
+        return answer_box.text.strip()
+    return None
 
-        main_content = ' '.join(content_elements)
+def get_google_results(soup, limit):
+    """Extract up to limit organic results (link, title, description) from a parsed results page."""
+    results = []
+    for data in soup.find_all("div", {"class": "g"}):
+        anchor = data.find('a')
+        link = anchor.get('href') if anchor else None
 
-        if len(main_content) > 3500:
-            main_content_limited = main_content[:3497-len(special_message)] + "..."
-        else:
-            main_content_limited = main_content
+        if link and link.startswith('http') and 'aclk' not in link:
+            result = {"link": link}
 
-        return main_content_limited if main_content_limited else "Main content not found or could not be extracted."
-    except Exception as e:
-        return f"Error processing content: {str(e)}"
+            title = data.find('h3', {"class": "DKV0Md"})
+            description = data.select_one(".VwiC3b, .MUxGbd, .yDYNvb, .lyLwlc")
 
-def get_google_direct_answer(searchquery):
-    try:
-        url = "https://www.google.com/search"
-        params = {"q": searchquery, "hl": "en"}
-        response = requests.get(url, params=params, headers={
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/74.0.3729.169 Safari/537.36'
-        })
+            result["title"] = title.text if title else None
+            result["description"] = description.text if description else None
 
-        if response.status_code != 200:
-            print("Failed to get a successful response from Google.")
-            return None
+            results.append(result)
+            if len(results) >= limit:
+                break
+    return results
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        answer_box = soup.find('div', class_="BNeawe iBp4i AP7Wnd")
-        if answer_box:
-            return answer_box.text.strip()
-    except Exception as e:
-        print(f"Error getting direct answer: {str(e)}")
-    return None
+search_result_pages = 3  # Result pages fetched for each search
+search_deadline = 6.0  # Seconds to wait for those pages before answering with what arrived
+search_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ultra-search")
 
+@tool_registry.register("search_google")
 def search_google_and_return_json_with_content(searchquery):
+    from bs4 import BeautifulSoup
+
     print(f"[Ultra is looking up {searchquery} on google...]")
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/74.0.3729.169 Safari/537.36'
     }
     try:
-        direct_answer = get_google_direct_answer(searchquery)
-
-        url = f'https://www.google.com/search?q={searchquery}&ie=utf-8&oe=utf-8&num=10'
-        html = requests.get(url, headers=headers)
-        if html.status_code != 200:
-            return json.dumps({"error": "Failed to fetch search results from Google."}, indent=4)
-
-        soup = BeautifulSoup(html.text, 'html.parser')
-        allData = soup.find_all("div", {"class": "g"})
-
-        results = []
-        for data in allData:
-            link = data.find('a').get('href')
-
-            if link and link.startswith('http') and 'aclk' not in link:
-                result = {"link": link}
-
-                title = data.find('h3', {"class": "DKV0Md"})
-                description = data.select_one(".VwiC3b, .MUxGbd, .yDYNvb, .lyLwlc")
-
-                result["title"] = title.text if title else None
-                result["description"] = description.text if description else None
-
-                results.append(result)
-                break
+        # Follow-up questions often repeat a search, so results are cached briefly
+        cached_search = get_web_cache().get_search(searchquery)
+        if cached_search:
+            direct_answer = cached_search["direct_answer"]
+            results = cached_search["results"]
+        else:
+            # One results page serves both the direct answer and the links
+            url = "https://www.google.com/search"
+            params = {"q": searchquery, "hl": "en", "ie": "utf-8", "oe": "utf-8", "num": 10}
+            html = get_session().get(url, params=params, headers=headers)
+            if html.status_code != 200:
+                return json.dumps({"error": "Failed to fetch search results from Google."}, indent=4)
+
+            soup = BeautifulSoup(html.text, 'html.parser')
+            direct_answer = get_google_direct_answer(soup)
+            results = get_google_results(soup, search_result_pages)
+            get_web_cache().put_search(searchquery, {"direct_answer": direct_answer, "results": results})
+
+        # Fetch the result pages concurrently and keep whatever arrived before the deadline;
+        # the fetches stop at the same deadline, so none of them outlives this search
+        deadline = time.monotonic() + search_deadline
+        futures = [search_pool.submit(fetch_main_content, result['link'], deadline) for result in results]
+        wait(futures, timeout=search_deadline)
+        for result, future in zip(results, futures):
+            if future.done():
+                result["content"] = future.result()
+            else:
+                future.cancel()
+                result["content"] = "Page did not load in time."
 
         if results:
-            first_link_content = fetch_main_content(results[0]['link'])
+            first_link_content = results[0].pop("content")
         else:
             first_link_content = "No valid links found."
 
@@ -693,8 +867,6 @@ def search_google_and_return_json_with_content(searchquery):
 
 date = datetime.now()
 
-import speech_recognition as sr
-
 system_prompt = f"""
 I'm Ultra, a voice assistant. My role is to assist the user using my tools when possible. I respond in the same language the user uses and ensure responses are concise, within 1-2 sentences, unless otherwise requested.
 
@@ -730,24 +902,105 @@ Manage App Subset: Manage multiple apps or subsets as requested.
     
 conversation = [{"role": "system", "content": system_prompt}]
 
-from pydub import AudioSegment
-from pydub.playback import play
 from apikey import api_key
 
 
 import requests
-from openai import OpenAI
 
 import time
-import io
 
-current_audio_thread = None
+openai_client = None
+openai_client_lock = threading.Lock()
+
+def get_openai_client():
+    """Return the OpenAI client, importing the SDK on first use."""
+    global openai_client
+
+    if openai_client:
+        return openai_client
+
+    with openai_client_lock:
+        if openai_client:
+            return openai_client
+
+        from openai import OpenAI
+
+        openai_client = OpenAI(api_key=api_key)
+        return openai_client
+
+tts_model = "tts-1"
+tts_voice = "echo"
+debug_save_speech = False  # Also write every spoken response to output.mp3
+speech_cache = None
+speech_cache_lock = threading.Lock()
+audio_scheduler = AudioScheduler()  # The only place audio is played from
+
+def get_speech_cache():
+    """Return the synthesized speech cache next to this script, opening it on first use."""
+    global speech_cache
+
+    if speech_cache:
+        return speech_cache
 
-recognizer = sr.Recognizer()
+    with speech_cache_lock:
+        if speech_cache:
+            return speech_cache
 
+        current_dir = os.path.dirname(os.path.abspath(__file__))
+        speech_cache = SpeechCache(os.path.join(current_dir, "tts_cache"), extension="pcm")
+        return speech_cache
 
-openai.api_key = api_key
-client = OpenAI(api_key=api_key)
+def synthesize_speech_chunks(text):
+    """
+    Yield raw 24 kHz PCM for the text as it downloads, or all at once from the
+    speech cache when this phrase was spoken before.
+    """
+    tracer = get_tracer()
+    with tracer.span("tts_cache", characters=len(text)) as span:
+        cache = get_speech_cache()
+        audio_bytes = cache.get(tts_model, tts_voice, text)
+        span.set(hit=audio_bytes is not None)
+    if audio_bytes is not None:
+        yield audio_bytes
+        return
+
+    chunks = []
+    start_time = time.perf_counter()
+    first_chunk_ms = None
+    with get_openai_client().audio.speech.with_streaming_response.create(
+        model=tts_model,
+        voice=tts_voice,
+        input=text,
+        response_format="pcm"
+    ) as response:
+        for chunk in response.iter_bytes(chunk_size=4096):
+            if first_chunk_ms is None:
+                first_chunk_ms = round((time.perf_counter() - start_time) * 1000, 3)
+            chunks.append(chunk)
+            yield chunk
+    # Includes the time the consumer spent between chunks, i.e. how long the download was spread over
+    tracer.record("tts", time.perf_counter() - start_time, characters=len(text), first_chunk_ms=first_chunk_ms,
+                  bytes=sum(len(chunk) for chunk in chunks))
+    cache.put(tts_model, tts_voice, text, b"".join(chunks))
+
+def save_speech_debug(text, file_path="output.mp3"):
+    """Encode the cached speech for the text to an MP3 file for debugging."""
+    from pydub import AudioSegment
+
+    pcm = get_speech_cache().get(tts_model, tts_voice, text)
+    if pcm:
+        audio = AudioSegment(data=pcm, sample_width=TTS_SAMPLE_WIDTH, frame_rate=TTS_SAMPLE_RATE, channels=TTS_CHANNELS)
+        audio.export(file_path, format="mp3")
+
+def prewarm_speech_cache():
+    """Synthesize the canned phrases ahead of time so they play without a network round-trip."""
+    for phrase in CANNED_PHRASES:
+        try:
+            for _ in synthesize_speech_chunks(phrase):
+                pass
+        except Exception as e:
+            print(f"Failed to pre-warm speech for '{phrase}': {e}")
+            return
 
 def speak(text):
     print("[Ultra is generating speech...]")
@@ -756,79 +1009,134 @@ def speak(text):
         return
 
     try:
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="echo",
-            input=text
-        )
-
-        byte_stream = io.BytesIO(response.content)
-
-        audio = AudioSegment.from_file(byte_stream, format="mp3")
-        audio.export("output.mp3", format="mp3")
-
         print("[Ultra is speaking a response...]")
-        play(audio)
+        audio_scheduler.play(synthesize_speech_chunks(text))
+
+        if debug_save_speech:
+            save_speech_debug(text)
 
     except Exception as e:
         print(f"An error occurred: {e}")
 
-        openai.api_key = api_key
 
 def speak_no_text(text):
     if not text:
         print("No text provided to speak.")
         return
 
-    def _speak():
-        try:
-            response = client.audio.speech.create(
-                model="tts-1",
-                voice="echo",
-                input=text
-            )
-
-            byte_stream = io.BytesIO(response.content)
-            audio = AudioSegment.from_file(byte_stream, format="mp3")
-            play(audio)
+    # Queued on the audio thread; returns without waiting for playback
+    audio_scheduler.submit(synthesize_speech_chunks(text))
 
-        except Exception as e:
-            print(f"An error occurred: {e}")
 
-    # Start the _speak function in a new thread
-    thread = threading.Thread(target=_speak)
-    thread.start()
+whisper_model_size = "small"  # "tiny", "base" or "small"
+transcription_engine = TranscriptionEngine(whisper_model_size)
+language_id_model_size = "tiny"  # Only identifies the language, so the smallest model is enough
+remote_recognition = False  # Send commands in the languages below to Google's recognizer instead
+remote_recognition_languages = {"uk": "uk-UA"}
+debug_save_audio = False  # Also write every utterance to captured_audio.wav
 
 
-def listen():
-    import whisper
+def recognize_remotely(audio, language_code):
     import speech_recognition as sr
 
-    r = sr.Recognizer()
-    with sr.Microphone() as source:
-        r.adjust_for_ambient_noise(source, duration=0.1)
-        threading.Thread(target=play_beep).start()
-        print("Listening for prompt... Speak now.")
-        audio = r.listen(source)
+    return sr.Recognizer().recognize_google(audio, language=language_code)
 
-    # Save the captured audio to a WAV file
-    audio_file = "captured_audio.wav"
-    with open(audio_file, "wb") as f:
-        f.write(audio.get_wav_data())
 
-    try:
-        recognized_text = r.recognize_google(audio, language="uk-UA")
-        print(f"Google Recognizer detected Ukrainian text: {recognized_text}")
-        return recognized_text
-    except sr.UnknownValueError:
-        print("Sorry, couldn't understand the speech. Or speech is not in ukrainian")
+recognition_router = RecognitionRouter(
+    transcription_engine,
+    language_engine=TranscriptionEngine(language_id_model_size),
+    remote=recognize_remotely if remote_recognition else None,
+    remote_languages=remote_recognition_languages
+)
+
+
+# Always-on listening: one shared input stream that the wake word detector and listen() both read
+wake_word_enabled = True
+wake_word_models = ["hey_jarvis"]  # openwakeword pre-trained model names or paths to .onnx/.tflite models
+wake_word_threshold = 0.5
+wake_word_thresholds = {}  # Per-model overrides, e.g. {"hey_jarvis": 0.6}
+microphone = MicrophoneStream()
 
-    # Load the Whisper model
-    model = whisper.load_model("small")  # Adjust the model size as needed
+# End-of-command detection on the shared stream
+# Seconds of silence after speech that end the command; long enough to ride out pauses between words.
+# It is also the least end of speech -> transcription start can be: 0.25 responds within ~300 ms but
+# cuts some commands off at a pause.
+vad_trailing_silence = 0.6
+vad_calibration_seconds = 1.5  # Audio from just before the command that the VAD measures the room on
+beep_echo_seconds = 0.1  # Still coming out of the speakers after the beep's last write
+vad_max_utterance = 15.0  # Seconds; longer commands are cut off here
+endpointer = Endpointer(rate=SAMPLE_RATE, trailing_silence=vad_trailing_silence, max_seconds=vad_max_utterance)
+# Transcribe while the user is still speaking, printing partial transcripts (local recognition only)
+incremental_transcription = True
+partial_transcription_interval = 1.0  # Seconds between partial passes
 
-    # Transcribe the audio file, without specifying the language (for automatic detection)
-    result = model.transcribe(audio_file, fp16=False)
 
+def listen(start_index=None):
+    """
+    Record one spoken command and return its text.
+
+    start_index is the shared microphone frame to start recording from (the
+    end of the wake word). A wake-word turn records from there without a
+    beep, so a command said in the same breath as the wake word keeps its
+    first words. A hotkey turn plays the beep and starts recording once it
+    has finished, so the beep is never taken for the start of the command.
+    """
+    import speech_recognition as sr
+
+    if microphone.is_running:
+        wake_word_turn = start_index is not None
+        if not wake_word_turn:
+            start_index = microphone.position
+        frame_seconds = microphone.frame_samples / microphone.rate
+        endpointer.calibrate(microphone.frames_before(start_index, int(vad_calibration_seconds / frame_seconds)))
+
+        if not wake_word_turn:
+            beep = audio_scheduler.play_beep()
+            if beep:
+                beep.wait(timeout=audio_scheduler.beep_seconds + 1)
+                time.sleep(beep_echo_seconds)
+                start_index = microphone.position
+        print("Listening for prompt... Speak now.")
+        partial = None
+        if incremental_transcription and not remote_recognition:
+            partial = recognition_router.start_partial(partial_transcription_interval)
+        with get_tracer().span("listen", source="shared_stream") as span:
+            utterance = endpointer.record(microphone.frames_since(start_index),
+                                          on_audio=partial.feed if partial else None)
+            if utterance:
+                span.set(ended_by=utterance.ended_by, audio_seconds=round(utterance.duration, 3),
+                         trailing_silence_ms=round(utterance.trailing_silence * 1000, 3))
+        if utterance is None:
+            if partial:
+                partial.cancel()
+            print("No speech detected.")
+            return ""
+        audio = sr.AudioData(utterance.pcm, utterance.rate, 2)
+        print(f"Speech ended ({utterance.ended_by}), end of speech -> transcription start "
+              f"{(time.perf_counter() - utterance.end_of_speech_time) * 1000:.0f} ms")
+        if debug_save_audio:
+            save_debug_audio(audio)
+        if partial:
+            with get_tracer().span("recognition", mode="incremental") as span:
+                result = partial.finish()
+                span.set(language=result["language"], partial_passes=result["partial_passes"])
+            return result["text"]
+    else:
+        r = sr.Recognizer()
+        with sr.Microphone(sample_rate=SAMPLE_RATE) as source:
+            r.adjust_for_ambient_noise(source, duration=0.1)
+            beep = audio_scheduler.play_beep()
+            if beep:
+                beep.wait(timeout=audio_scheduler.beep_seconds + 1)
+            print("Listening for prompt... Speak now.")
+            with get_tracer().span("listen", source="sr_microphone"):
+                audio = r.listen(source)
+        if debug_save_audio:
+            save_debug_audio(audio)
+
+    with get_tracer().span("recognition", mode="full") as span:
+        result = recognition_router.recognize(audio_data_to_pcm(audio), audio)
+        span.set(language=result["language"], route=result["route"])
     return result["text"]
 
 
@@ -845,34 +1153,38 @@ warnings.filterwarnings("ignore", category=NotOpenSSLWarning)
 def display_timeout_message():
     print("[Ultra is taking longer than expected...]")
     
-conversation_history_file = "conversation_history.txt"
-
-def serialize_object(obj):
-    """Converts a custom object to a dictionary."""
-    if hasattr(obj, '__dict__'):
-        # For general objects, convert their __dict__ property
-        return {key: serialize_object(value) for key, value in obj.__dict__.items()}
-    elif isinstance(obj, list):
-        return [serialize_object(item) for item in obj]
-    elif isinstance(obj, dict):
-        return {key: serialize_object(value) for key, value in obj.items()}
-    else:
-        # If it's already a serializable type, return it as is
-        return obj
+conversation_history_file = "conversation_history.jsonl"
 
-def save_conversation_history(history):
-    serializable_history = [serialize_object(message) for message in history]
-    with open(conversation_history_file, 'w') as file:
-        json.dump(serializable_history, file)
+# Loaded once and kept in memory; older installs are migrated from conversation_history.txt
+conversation_store = ConversationHistoryStore(conversation_history_file,
+                                              legacy_file_path="conversation_history.txt")
 
 def load_conversation_history():
-    try:
-        with open(conversation_history_file, 'r') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return []
+    return conversation_store.load()
+
+def summarize_conversation(previous_summary, new_messages):
+    """Fold older conversation messages into the rolling summary."""
+    transcript = "\n".join(f"{message['role']}: {message.get('content') or ''}" for message in new_messages)
+    prompt = "Update the summary of this conversation between a user and the voice assistant Ultra. " \
+             "Keep names, preferences, facts and open tasks; drop small talk. Answer with the summary only.\n\n"
+    if previous_summary:
+        prompt += f"Current summary:\n{previous_summary}\n\n"
+    prompt += f"New messages:\n{transcript}"
+
+    response = get_openai_client().chat.completions.create(
+        model=current_model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3
+    )
+    return response.choices[0].message.content
+
+memory_top_k = 5  # Stored memories sent with each request
+context_token_budget = 6000  # Prompt tokens per request, excluding the tool schemas
+context_window = ContextWindow(summarize_conversation, token_budget=context_token_budget, keep_last_messages=8,
+                               state_path="conversation_summary.json")
 
 first_user_message = True  # A flag to detect the first user message.
+tool_executor = ToolExecutor(max_workers=4)
 
 def load_easy_names_from_json(file_path):
     with open(file_path, 'r') as file:
@@ -880,44 +1192,72 @@ def load_easy_names_from_json(file_path):
     return list(data.keys())  # Extract and return the keys as a list
 
 
-def load_json(file_path):
-    """Loads JSON data from a file."""
-    with open(file_path, 'r') as file:
-        return json.load(file)
+def consume_completion_stream(stream, on_text):
+    """
+    Read a streamed chat completion, passing each text delta to on_text as it arrives.
+    Returns the full content and the tool calls reassembled from their deltas.
+    """
+    from openai.types.chat import ChatCompletionMessageToolCall
+    from openai.types.chat.chat_completion_message_tool_call import Function
+
+    content_parts = []
+    tool_call_parts = {}
+
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+
+        if delta.content:
+            content_parts.append(delta.content)
+            on_text(delta.content)
+
+        for tool_call_delta in delta.tool_calls or []:
+            part = tool_call_parts.setdefault(tool_call_delta.index, {"id": None, "name": "", "arguments": ""})
+            if tool_call_delta.id:
+                part["id"] = tool_call_delta.id
+            if tool_call_delta.function:
+                part["name"] += tool_call_delta.function.name or ""
+                part["arguments"] += tool_call_delta.function.arguments or ""
+
+    tool_calls = [
+        ChatCompletionMessageToolCall(
+            id=part["id"],
+            type="function",
+            function=Function(name=part["name"], arguments=part["arguments"])
+        )
+        for _, part in sorted(tool_call_parts.items())
+    ]
+    return "".join(content_parts), tool_calls
 
 
-def ask(question):
+def ask(question, on_text=None):
+    """
+    Answer a question. When on_text is given the completions are streamed and
+    every text delta is passed to it as soon as it arrives.
+    """
     print("User:", question)
     print(" ")
     global conversation_history
     conversation_history = load_conversation_history()  # Load the conversation history at the start
     print("[Processing request...]")
     if not question:
+        if on_text:
+            on_text("I didn't hear you.")
         return "I didn't hear you."
 
     # Check and maintain system prompt logic
-    if conversation_history and conversation_history[0]['role'] == 'system':
-        conversation_history[0]['content'] = system_prompt
-    elif not conversation_history:
-        conversation_history.append({"role": "system", "content": system_prompt})
+    conversation_store.set_system_prompt(system_prompt)
 
-    # Proceed as normal with the adjusted question
-    messages = conversation_history.copy()
-    file_path = get_memory_file_path()
-
-    # Read memory file
-    with open(file_path, 'r') as file:
-        memory = json.load(file)
-
-    # Format retrieved data as proper message objects
-    for item in memory:
-        messages.append({
-            "role": "system",
-            "content": item["data"]
-        })
+    tracer = get_tracer()
+    with tracer.span("context") as span:
+        # Only the memories relevant to this question, as proper message objects
+        memory = get_memory_store().search(question, k=memory_top_k)
+        memory_messages = [{"role": "system", "content": item["data"]} for item in memory]
 
-    # Append user question
-    messages.append({"role": "user", "content": question})
+        # Fit history, memories and the user question into the token budget
+        messages = context_window.build(conversation_history, memory_messages, question)
+        span.set(memories=len(memory_messages), messages=len(messages))
 
     print("Messages before API call:")
     print(messages)
@@ -925,26 +1265,34 @@ def ask(question):
     timeout_timer = threading.Timer(7.0, lambda: print("Request timeout."))
     timeout_timer.start()
 
-    tools = load_json('tools.json')
+    tools = tool_registry.get_schemas()
 
     try:
-        response = openai.chat.completions.create(
-            model=current_model,
-            messages=messages,
-            tool_choice="auto",
-            tools=tools,
-            temperature=0.7
-        )
-        print("Initial API Response JSON:", response)
-        response_message = response.choices[0].message
+        with tracer.span("llm", call="initial", model=current_model, streamed=on_text is not None) as span:
+            start_time = time.perf_counter()
+            response = get_openai_client().chat.completions.create(
+                model=current_model,
+                messages=messages,
+                tool_choice="auto",
+                tools=tools,
+                temperature=0.7,
+                stream=on_text is not None
+            )
+            span.set(response_ms=round((time.perf_counter() - start_time) * 1000, 3))
+            if on_text:
+                response_content, tool_calls = consume_completion_stream(response, on_text)
+                print("Initial API Response (streamed):", response_content, tool_calls)
+            else:
+                print("Initial API Response JSON:", response)
+                response_message = response.choices[0].message
+                response_content = response_message.content if response_message else ""
+                tool_calls = response_message.tool_calls if response_message and hasattr(response_message, 'tool_calls') else []
+            span.set(tool_calls=len(tool_calls or []))
     finally:
         timeout_timer.cancel()
         timeout_timer_second = threading.Timer(12.0, display_timeout_message)
         timeout_timer_second.start()
 
-    response_content = response_message.content if response_message else ""
-    tool_calls = response_message.tool_calls if response_message and hasattr(response_message, 'tool_calls') else []
-
     final_response_message = ""
     if tool_calls:
         # Create a valid assistant message with tool calls
@@ -955,30 +1303,25 @@ def ask(question):
         }
         messages.append(assistant_message)
 
-        # Process tool calls
+        # Process tool calls, independent ones concurrently
         available_functions = initialize_and_extend_available_functions()
-
-        for tool_call in tool_calls:
-            function_name = tool_call.function.name
-            if function_name in available_functions:
-                function_args = json.loads(tool_call.function.arguments)
-                function_response = available_functions[function_name](**function_args)
-
-                tool_response_message = {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "name": function_name,
-                    "content": str(function_response)  # Ensure content is string
-                }
-                messages.append(tool_response_message)
+        with tracer.span("tools", count=len(tool_calls)):
+            messages.extend(tool_executor.run(tool_calls, available_functions))
 
         # Make a final API call after processing tool calls
         try:
-            final_response = openai.chat.completions.create(
-                model=current_model,
-                messages=messages,
-            )
-            final_response_message = final_response.choices[0].message.content
+            with tracer.span("llm", call="final", model=current_model, streamed=on_text is not None) as span:
+                start_time = time.perf_counter()
+                final_response = get_openai_client().chat.completions.create(
+                    model=current_model,
+                    messages=messages,
+                    stream=on_text is not None
+                )
+                span.set(response_ms=round((time.perf_counter() - start_time) * 1000, 3))
+                if on_text:
+                    final_response_message, _ = consume_completion_stream(final_response, on_text)
+                else:
+                    final_response_message = final_response.choices[0].message.content
         finally:
             timeout_timer_second.cancel()
 
@@ -987,34 +1330,71 @@ def ask(question):
         final_response_message = response_content
 
     if final_response_message:
-        # Add the final response to conversation history
-        conversation_history.append({"role": "assistant", "content": final_response_message})
+        # Append the final response to conversation history
+        conversation_store.append({"role": "assistant", "content": final_response_message})
         print(f"Final Response: {final_response_message}")
     else:
         print("No final response message to append.")
 
-    save_conversation_history(conversation_history)
-
     timeout_timer_second.cancel()  # Ensure the second timer is cancelled in all paths
     return final_response_message
 
 
-def reply(question):
-    response_content = ask(question)
-    time.sleep(0.1)
-    print("Ultra:", str(response_content))
-    print(" ")
+stream_responses = True  # Speak each sentence as soon as the model has generated it
+current_speaker = None
+
 
-    # Check if the response contains the no_speak flag
+def interrupt_speech():
+    """Cut off whatever Ultra is saying, including sentences not synthesized yet."""
+    if current_speaker:
+        current_speaker.cancel()
+    audio_scheduler.interrupt()
+
+
+def is_speaking_answer():
+    """True once the current turn has started playing its streamed answer."""
+    speaker = current_speaker
+    return speaker is not None and speaker.first_audio_at is not None
+
+
+def reply(question):
+    global current_speaker
+    speaker = None
+    if stream_responses:
+        speaker = SentenceSpeaker(synthesize_speech_chunks, audio_scheduler.play)
+        current_speaker = speaker
+
+    # The speaker's synthesis and playback threads only exit once it is finished
+    # or cancelled, so a turn that fails part-way must still cancel it.
+    finished = False
     try:
-        response_json = json.loads(response_content)
-        if isinstance(response_json, dict) and response_json.get("no_speak"):
-            pass
-        else:
+        response_content = ask(question, on_text=speaker.feed if speaker else None)
+        time.sleep(0.1)
+        print("Ultra:", str(response_content))
+        print(" ")
+
+        # Check if the response contains the no_speak flag
+        try:
+            response_json = json.loads(response_content)
+            should_speak = not (isinstance(response_json, dict) and response_json.get("no_speak"))
+        except json.JSONDecodeError:
+            # If response is not JSON, treat it normally
+            should_speak = True
+
+        if speaker:
+            if should_speak:
+                speaker.finish()
+                speaker.wait()
+                finished = True
+                if speaker.time_to_first_audio is not None:
+                    get_tracer().record("first_audio", speaker.time_to_first_audio)
+        elif should_speak:
             speak(response_content)
-    except json.JSONDecodeError:
-        # If response is not JSON, treat it normally
-        speak(response_content)
+    finally:
+        if speaker and not finished:
+            speaker.cancel()
+        if current_speaker is speaker:
+            current_speaker = None
 
     ends_with_question_mark = response_content.strip().endswith('?')
     contains_assist_phrase = ("How can I assist you today?" in response_content or
@@ -1028,105 +1408,46 @@ def reply(question):
         return response_content, ends_with_question_mark
     
 def initialize_and_extend_available_functions():
-    # Initialize with core functions
-    available_functions = {
-             "search_google": search_google_and_return_json_with_content,
-             "get_current_weather": get_current_weather,
-             "use_calculator": perform_math,
-             "personal_memory": memorize,
-             "search_and_play_song": search_and_play_song,
-             "toggle_spotify_playback": toggle_spotify_playback,
-             "set_spotify_volume": set_spotify_volume,
-             "set_system_volume": set_system_volume,
-             "get_current_datetime": get_current_datetime,
-            "control_pc": control_pc,
-            "open_application": open_application,
-            "open_browser": open_browser,
-            "manage_app_subset": manage_app_subset,
-         }
-    return available_functions
-
-def pause_spotify_playback():
-    try:
-        sp.pause_playback()
-    except Exception as e:
-        print("Failed to pause Spotify playback:", e)
-
-def resume_spotify_playback():
-    try:
-        sp.start_playback()
-    except Exception as e:
-        print("Failed to resume Spotify playback:", e)
-
-def get_spotify_current_volume():
-    """
-    Get the current volume level for Spotify's playback.
-    """
-    try:
-        current_playback_info = sp.current_playback()
-        if current_playback_info and 'device' in current_playback_info:
-            return current_playback_info['device']['volume_percent']
-        else:
-            return None
-    except Exception as e:
-        print("Failed to get current volume from Spotify:", e)
-        return None
-        
-def control_spotify_playback():
-    global was_spotify_playing, original_volume
-    was_spotify_playing = is_spotify_playing()
-    original_volume = get_spotify_current_volume()
-
-    try:
-        if was_spotify_playing:
-            pause_spotify_playback()
+    # Every tool registers itself with @tool_registry.register next to its definition
+    return tool_registry.functions
 
-        if original_volume is not None:
-            set_spotify_volume(int(original_volume * 0.60))
-    except Exception as e:
-        print("Error controlling Spotify playback:", e)
-        
-        
-def is_spotify_playing():
-    """
-    Check if Spotify is currently playing music.
-    Returns True if playing, False if paused or stopped, and None if unable to determine.
-    """
-    try:
-        playback_state = sp.current_playback()
-        if playback_state and 'is_playing' in playback_state:
-            return playback_state['is_playing']
-        return None
-    except Exception as e:
-        print("Failed to get Spotify playback state:", e)
-        return None
-    
 import os
 import platform
-import pyaudio
-import numpy as np
 import subprocess
 import threading
-from pynput import keyboard
+import importlib
 
 BEEP_SOUND_PATH = "beep_sound.wav"
+turn_lock = threading.Lock()  # One turn at a time, whether the hotkey, the wake word or typed text started it
+trace_file = "traces.jsonl"  # Per-stage timings of every turn; summarize with `python tracing.py traces.jsonl`
+tracing_enabled = True
 
-def play_beep():
-    if platform.system() == 'Darwin':  # macOS
-        subprocess.run(["afplay", BEEP_SOUND_PATH])
-    elif platform.system() == 'Windows':
-        import winsound  # Import winsound only on Windows
-        winsound.PlaySound(BEEP_SOUND_PATH, winsound.SND_FILENAME)
-    elif platform.system() == 'Linux':
-        # Use aplay for Linux audio playback
-        subprocess.run(["aplay", BEEP_SOUND_PATH])
-    else:
-        print("Unsupported operating system for beep sound, tried Linux, Windows, and macOS. All Failed.")
+# Heavy tool dependencies that are otherwise imported on first use
+WARM_UP_MODULES = ["bs4", "pydub"]
+
+
+def warm_up():
+    """Import and construct the heavy dependencies in the background once Ultra accepts input."""
+    for step in (get_openai_client, load_encoding, get_spotify, get_app_subset_manager):
+        try:
+            step()
+        except Exception as e:
+            print(f"Warm-up: {step.__name__} failed: {e}")
+    get_spotify_state().start_token_refresh()
+    for module_name in WARM_UP_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"Warm-up: importing {module_name} failed: {e}")
+    print(f"Warm-up finished after {seconds_since_start():.2f}s")
+    if import_report_requested():
+        print("Import time by module:")
+        print(import_timer.report())
 
 
 def main():
-    initialize_and_extend_available_functions()
-    global was_spotify_playing, original_volume, user_requested_pause
+    if tracing_enabled:
+        get_tracer().open(os.path.join(os.path.dirname(os.path.abspath(__file__)), trace_file))
 
     def handle_keyboard_input():
         while True:
@@ -1134,40 +1455,95 @@ def main():
                 # Read input from stdin
                 user_input = input().strip()
                 if user_input:
-                    threading.Thread(target=control_spotify_playback).start()
-                    response, should_continue = reply(user_input)
-
-                    # Adjust Spotify volume and playback based on state before the command
-                    if original_volume is not None and not user_requested_pause:
-                        set_spotify_volume2(original_volume)
-                    if was_spotify_playing and not user_requested_pause:
-                        resume_spotify_playback()
-                        set_spotify_volume2(original_volume)
+                    with turn_lock:  # Typed text waits for a voice turn to finish
+                        get_tracer().start_turn("text")
+                        ducking = get_ducking_controller()
+                        ducking.duck()
+                        try:
+                            with get_tracer().span("turn", source="text"):
+                                response, should_continue = reply(user_input)
+                        finally:
+                            ducking.restore()
             except EOFError:
                 break
             except Exception as e:
                 print(f"Error processing input: {str(e)}")
 
-    def on_activate():
-        print('Getting mic ready...')
-        print('Alt+I pressed, listening for command...')
-        threading.Thread(target=control_spotify_playback).start()
+    def voice_turn(start_index=None, holds_lock=False):
+        # A barge-in waits for the interrupted turn to wind down before taking over
+        if not holds_lock and not turn_lock.acquire(timeout=3.0):
+            print("[Ultra is still finishing the previous command...]")
+            return
+        try:
+            get_tracer().start_turn("voice")
+            ducking = get_ducking_controller()
+            # Both only queue work for the ducking thread, so neither holds up listening or speech
+            ducking.duck()
+            try:
+                with get_tracer().span("turn", source="voice"):
+                    query = listen(start_index)
+                    reply(query)
+            finally:
+                ducking.restore()
+        finally:
+            turn_lock.release()
+
+    def start_voice_turn(start_index=None) -> bool:
+        """
+        Start a voice turn for the hotkey or the wake word. While another turn is
+        listening or thinking the trigger is ignored; while it is only speaking
+        its answer, the answer is cut off and the new turn takes over (barge-in).
+        """
+        if turn_lock.acquire(blocking=False):
+            holds_lock = True
+        elif is_speaking_answer():
+            interrupt_speech()
+            holds_lock = False
+        else:
+            print("[Ultra is busy with the current command...]")
+            return False
+        # Run the turn off the trigger's thread so the next trigger is seen right away
+        threading.Thread(target=voice_turn, args=(start_index, holds_lock), daemon=True).start()
+        return True
 
-        query = listen()
-        reply(query)
+    def on_activate():
+        if start_voice_turn():
+            print('Getting mic ready...')
+            print('Alt+I pressed, listening for command...')
 
-        if original_volume is not None and not user_requested_pause:
-            set_spotify_volume2(original_volume)
-        if was_spotify_playing and not user_requested_pause:
-            resume_spotify_playback()
-            set_spotify_volume2(original_volume)
+    def on_wake_word(frame_index):
+        start_voice_turn(frame_index)
 
-    # Create threads for both keyboard and hotkey listening
+    # Text input only needs the conversation state loaded at import; everything else loads behind it
     keyboard_thread = threading.Thread(target=handle_keyboard_input)
     keyboard_thread.daemon = True
     keyboard_thread.start()
+    print("[Ultra is ready for input]", flush=True)
+    print(f"Ready for text input after {seconds_since_start():.2f}s", flush=True)
+    threading.Thread(target=warm_up, daemon=True, name="ultra-warm-up").start()
+
+    recognition_router.load_in_background()
+    audio_scheduler.load_beep(BEEP_SOUND_PATH)
+    threading.Thread(target=prewarm_speech_cache, daemon=True).start()
+    for problem in tool_registry.validate():
+        print(f"Tool registry: {problem}")
+
+    try:
+        # Opened once and kept open; listen() and the wake word detector both read from it
+        microphone.start()
+    except Exception as e:
+        print(f"Could not open the shared microphone stream, opening it per command instead: {e}")
+
+    if wake_word_enabled and microphone.is_running:
+        try:
+            WakeWordDetector(microphone, on_wake_word, models=wake_word_models, threshold=wake_word_threshold,
+                             thresholds=wake_word_thresholds).start()
+        except Exception as e:
+            print(f"Wake word detection is unavailable, use Alt+I instead: {e}")
 
     # Set up the global hotkey listener
+    from pynput import keyboard
+
     with keyboard.GlobalHotKeys({'<alt>+i': on_activate}):
         print("Listening for 'Alt+I' or keyboard input...")
         keyboard_thread.join()  # Wait for keyboard thread to finish
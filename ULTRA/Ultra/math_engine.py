@@ -0,0 +1,165 @@
+import ast
+import math
+import operator
+from functools import lru_cache
+from typing import Callable, Dict
+
+# Largest integer exponent and operand size the fast path will compute exactly;
+# anything bigger is left to SymPy, which evaluates it as a float instead.
+MAX_EXACT_EXPONENT = 1000
+MAX_EXACT_BITS = 4096
+
+BINARY_OPERATORS: Dict[type, Callable] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS: Dict[type, Callable] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+# Names SymPy's sympify() gives the same meaning. Note that a bare "e" is a
+# symbol to SymPy, so only "E" is Euler's number here too.
+CONSTANTS = {"pi": math.pi, "E": math.e}
+
+# Only functions whose float result is what SymPy would print. Trig, exp and
+# log are left to SymPy, which evaluates them exactly first: sin(pi) is 0
+# there but 1.2e-16 in floating point.
+FUNCTIONS: Dict[str, Callable] = {
+    "sqrt": math.sqrt,
+    "abs": abs,
+    "Abs": abs,
+    "floor": math.floor,
+    "ceiling": math.ceil,
+    "factorial": math.factorial,
+}
+
+
+class NotNumeric(Exception):
+    """The expression needs SymPy: it has symbols, unknown functions or unsafe sizes."""
+
+
+def normalize(task: str) -> str:
+    """Canonical form used as the cache key: no whitespace, "^" as power (like sympify)."""
+    return "".join(task.split()).replace("^", "**")
+
+
+def evaluate_numeric(expression: str):
+    """
+    Evaluate plain arithmetic with Python numbers, raising NotNumeric for
+    anything that isn't. Integers stay exact unless they are divided.
+    """
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        raise NotNumeric(expression)
+    return _evaluate_node(tree.body)
+
+
+def _evaluate_node(node):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return _checked(node.value)
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](_evaluate_node(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left = _evaluate_node(node.left)
+        right = _evaluate_node(node.right)
+        if isinstance(node.op, ast.Pow) and isinstance(left, int) and isinstance(right, int):
+            if abs(right) > MAX_EXACT_EXPONENT or left.bit_length() * abs(right) > MAX_EXACT_BITS:
+                raise NotNumeric("exponent too large to compute exactly")
+        try:
+            result = BINARY_OPERATORS[type(node.op)](left, right)
+        except (ZeroDivisionError, OverflowError):
+            raise NotNumeric("left to SymPy (zoo, oo or a huge float)")
+        return _checked(result)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS \
+            and not node.keywords:
+        arguments = [_evaluate_node(argument) for argument in node.args]
+        if node.func.id == "factorial" and len(arguments) == 1 and isinstance(arguments[0], int) \
+                and arguments[0] > 1 and math.lgamma(arguments[0] + 1) / math.log(2) > MAX_EXACT_BITS:
+            raise NotNumeric("factorial too large to compute exactly")
+        try:
+            result = FUNCTIONS[node.func.id](*arguments)
+        except (ValueError, TypeError, OverflowError):
+            raise NotNumeric("outside the real domain or unsupported arguments")
+        return _checked(result)
+    raise NotNumeric(ast.dump(node))
+
+
+def _checked(value):
+    """Refuse results SymPy would print differently: complex, inf/nan, or integers too long to print."""
+    if isinstance(value, complex):
+        raise NotNumeric("complex result")  # e.g. (-8)**(1/3)
+    if isinstance(value, float) and not math.isfinite(value):
+        raise NotNumeric("float overflow")  # e.g. 1e308*10
+    if isinstance(value, int) and value.bit_length() > MAX_EXACT_BITS:
+        raise NotNumeric("integer too large")
+    return value
+
+
+def format_number(value) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return f"{value:.15g}"
+
+
+class MathEngine:
+    """
+    Evaluate use_calculator tasks: expressions ("2*3+4") and equations ("2*x+3=11").
+
+    Each task is normalized and its result kept in an LRU cache, so a repeated
+    question costs a dictionary lookup. Plain arithmetic (with sqrt, abs,
+    floor, ceiling and factorial) is evaluated with Python numbers from the
+    parsed AST, without SymPy. SymPy (imported on first need) handles
+    everything else: expressions with symbols or functions the fast path
+    doesn't take, results it can't represent exactly, and equations, which are
+    solved for their symbols.
+    """
+
+    def __init__(self, cache_size: int = 512):
+        self.fast_path_hits = 0
+        self.sympy_evaluations = 0
+        self._evaluate_cached = lru_cache(maxsize=cache_size)(self._evaluate_normalized)
+
+    def evaluate(self, task: str) -> str:
+        """Return the result of one task as text; raises if SymPy can't parse it."""
+        return self._evaluate_cached(normalize(task))
+
+    def cache_info(self):
+        return self._evaluate_cached.cache_info()
+
+    def _evaluate_normalized(self, expression: str) -> str:
+        if "=" in expression:
+            return self._solve(expression)
+        try:
+            result = evaluate_numeric(expression)
+            self.fast_path_hits += 1
+            return format_number(result)
+        except NotNumeric:
+            pass
+
+        import sympy
+
+        self.sympy_evaluations += 1
+        return str(sympy.sympify(expression).evalf())
+
+    def _solve(self, equation: str) -> str:
+        import sympy
+
+        self.sympy_evaluations += 1
+        lhs, rhs = equation.split("=")
+        lhs_expr = sympy.sympify(lhs)
+        rhs_expr = sympy.sympify(rhs)
+
+        # Identify all symbols (variables) in the equation
+        symbols = lhs_expr.free_symbols.union(rhs_expr.free_symbols)
+
+        # For multiple symbols, solve() returns a list of solution dictionaries
+        return str(sympy.solve(lhs_expr - rhs_expr, *symbols))
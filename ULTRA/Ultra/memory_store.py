@@ -0,0 +1,247 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+STOP_WORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "is", "are", "was", "were", "be",
+    "it", "that", "this", "with", "as", "at", "by", "my", "me", "i", "you", "your", "what", "do", "does",
+    "і", "й", "та", "в", "у", "на", "з", "що", "це", "я", "ти", "мені", "мій", "моя",
+}
+EMBEDDING_DIMENSIONS = 256
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase keyword terms, dropping stop words."""
+    return [term for term in TOKEN_PATTERN.findall(text.lower()) if term not in STOP_WORDS and len(term) > 1]
+
+
+def hashed_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> np.ndarray:
+    """
+    Embed text locally by hashing its character trigrams into a fixed-size vector.
+
+    This needs no model download and still matches word forms that share stems
+    ("birthday" / "birthdays", "дружина" / "дружини"), which pure keywords miss.
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode('utf-8')) % dimensions] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class MemoryStore:
+    """
+    Personal memories in SQLite with an inverted keyword index.
+
+    Storing a memory is a single insert, and search() ranks memories against a
+    question with BM25 over the keyword index, optionally blended with the cosine
+    similarity of local hashed embeddings, so only the top matches are sent to
+    the model.
+    """
+
+    def __init__(self, db_path: str = "memory.db", legacy_file_path: Optional[str] = None,
+                 use_embeddings: bool = True, embedding_weight: float = 0.5):
+        self.db_path = db_path
+        self.use_embeddings = use_embeddings
+        self.embedding_weight = embedding_weight
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS memories (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data TEXT NOT NULL,
+                store_time TEXT NOT NULL,
+                retrieve_time TEXT,
+                term_count INTEGER NOT NULL,
+                embedding BLOB
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT NOT NULL,
+                memory_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (term, memory_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self._connection.commit()
+
+        # Rows [0, len(_embedding_ids)) of _embedding_buffer are in use; its
+        # capacity doubles when full, so store() appends in amortized O(1).
+        self._embedding_ids: List[int] = []
+        self._embedding_buffer = np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+        if use_embeddings:
+            self._load_embeddings()
+
+        if legacy_file_path:
+            self._import_legacy_file(legacy_file_path)
+
+    def _load_embeddings(self) -> None:
+        rows = self._connection.execute("SELECT id, data, embedding FROM memories ORDER BY id").fetchall()
+        vectors = []
+        for memory_id, data, blob in rows:
+            vector = np.frombuffer(blob, dtype=np.float32) if blob else hashed_embedding(data)
+            self._embedding_ids.append(memory_id)
+            vectors.append(vector)
+        if vectors:
+            self._embedding_buffer = np.vstack(vectors)
+
+    @property
+    def _embeddings(self) -> np.ndarray:
+        return self._embedding_buffer[:len(self._embedding_ids)]
+
+    def _append_embedding(self, memory_id: int, embedding: np.ndarray) -> None:
+        count = len(self._embedding_ids)
+        if count == len(self._embedding_buffer):
+            grown = np.zeros((max(16, 2 * count), EMBEDDING_DIMENSIONS), dtype=np.float32)
+            grown[:count] = self._embedding_buffer[:count]
+            self._embedding_buffer = grown
+        self._embedding_buffer[count] = embedding
+        self._embedding_ids.append(memory_id)
+
+    def _import_legacy_file(self, file_path: str) -> None:
+        """
+        Move memories from the old memory.txt JSON array into the database once.
+
+        The import is recorded in the meta table, so clearing the memories
+        later doesn't bring the old file back on the next start.
+        """
+        with self._lock:
+            imported = self._connection.execute(
+                "SELECT value FROM meta WHERE key = 'legacy_imported'"
+            ).fetchone()
+        if imported or not os.path.exists(file_path):
+            return
+
+        # Databases created before the import was recorded already hold these memories
+        legacy_memory = []
+        if self.count() == 0:
+            try:
+                with open(file_path, 'r') as file:
+                    legacy_memory = json.load(file)
+            except (json.JSONDecodeError, OSError):
+                return
+            for item in legacy_memory:
+                self.store(item["data"], item.get("store_time") or "")
+
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                                     (file_path,))
+            self._connection.commit()
+        if legacy_memory:
+            print(f"Imported {len(legacy_memory)} memories from {file_path}.")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+
+    def store(self, data: str, store_time: str) -> int:
+        """Add a memory and index its terms."""
+        terms = Counter(tokenize(data))
+        embedding = hashed_embedding(data) if self.use_embeddings else None
+
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO memories (data, store_time, term_count, embedding) VALUES (?, ?, ?, ?)",
+                (data, store_time, sum(terms.values()), embedding.tobytes() if embedding is not None else None)
+            )
+            memory_id = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO terms (term, memory_id, count) VALUES (?, ?, ?)",
+                [(term, memory_id, count) for term, count in terms.items()]
+            )
+            self._connection.commit()
+
+            if embedding is not None:
+                self._append_embedding(memory_id, embedding)
+        return memory_id
+
+    def retrieve_all(self, retrieve_time: str) -> List[Dict]:
+        """Return every memory, marking it as retrieved."""
+        with self._lock:
+            self._connection.execute("UPDATE memories SET retrieve_time = ?", (retrieve_time,))
+            self._connection.commit()
+            rows = self._connection.execute(
+                "SELECT data, store_time, retrieve_time FROM memories ORDER BY id"
+            ).fetchall()
+        return [{"data": data, "store_time": store_time, "retrieve_time": retrieved} for data, store_time, retrieved in rows]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM terms")
+            self._connection.execute("DELETE FROM memories")
+            self._connection.commit()
+            self._embedding_ids = []
+            self._embedding_buffer = np.zeros((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.2) -> List[Dict]:
+        """Return up to k memories most relevant to the query, best first."""
+        query_terms = set(tokenize(query))
+        scores: Dict[int, float] = {}
+
+        with self._lock:
+            total, average_length = self._connection.execute(
+                "SELECT COUNT(*), AVG(term_count) FROM memories"
+            ).fetchone()
+            if not total:
+                return []
+            average_length = average_length or 1.0
+
+            if query_terms:
+                placeholders = ",".join("?" * len(query_terms))
+                postings = self._connection.execute(
+                    f"SELECT t.term, t.memory_id, t.count, m.term_count FROM terms t "
+                    f"JOIN memories m ON m.id = t.memory_id WHERE t.term IN ({placeholders})",
+                    list(query_terms)
+                ).fetchall()
+                document_frequency = Counter(term for term, _, _, _ in postings)
+                for term, memory_id, count, length in postings:
+                    scores[memory_id] = scores.get(memory_id, 0.0) + _bm25(count, length, average_length,
+                                                                           document_frequency[term], total)
+
+            if scores:
+                best = max(scores.values())
+                scores = {memory_id: score / best for memory_id, score in scores.items()}
+
+            if self.use_embeddings and len(self._embedding_ids):
+                similarities = self._embeddings @ hashed_embedding(query)
+                for memory_id, similarity in zip(self._embedding_ids, similarities):
+                    if similarity > 0:
+                        scores[memory_id] = (1 - self.embedding_weight) * scores.get(memory_id, 0.0) \
+                                            + self.embedding_weight * float(similarity)
+
+            ranked = [(memory_id, score) for memory_id, score in scores.items() if score >= min_score]
+            ranked.sort(key=lambda item: item[1], reverse=True)
+            ranked = ranked[:k]
+            if not ranked:
+                return []
+
+            placeholders = ",".join("?" * len(ranked))
+            rows = dict((row[0], row[1:]) for row in self._connection.execute(
+                f"SELECT id, data, store_time FROM memories WHERE id IN ({placeholders})",
+                [memory_id for memory_id, _ in ranked]
+            ).fetchall())
+
+        return [{"data": rows[memory_id][0], "store_time": rows[memory_id][1], "score": score}
+                for memory_id, score in ranked]
+
+
+def _bm25(term_count: int, length: int, average_length: float, document_frequency: int, total: int,
+          k1: float = 1.2, b: float = 0.75) -> float:
+    idf = math.log(1 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+    return idf * term_count * (k1 + 1) / (term_count + k1 * (1 - b + b * length / average_length))
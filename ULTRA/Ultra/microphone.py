@@ -0,0 +1,124 @@
+import collections
+import threading
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from speech_engine import SAMPLE_RATE
+
+FRAME_SAMPLES = 1280  # 80 ms at 16 kHz, the frame size openwakeword is built around
+
+
+class MicrophoneStream:
+    """
+    One PyAudio input stream shared by everything that listens.
+
+    A reader thread pulls 16-bit mono frames off the device and appends them to
+    a ring buffer, numbering each frame. Consumers read with frames_since(),
+    starting from any frame still in the buffer, so a caller that only decides
+    to record after the fact (e.g. once a wake word has been recognized) still
+    gets the audio that followed it. Consumers that fall further behind than
+    the buffer skip ahead to its oldest frame.
+    """
+
+    def __init__(self, rate: int = SAMPLE_RATE, frame_samples: int = FRAME_SAMPLES,
+                 buffer_seconds: float = 5.0, device_index: Optional[int] = None):
+        self.rate = rate
+        self.frame_samples = frame_samples
+        self.device_index = device_index
+        self.dropped_frames = 0
+
+        self._frames = collections.deque(maxlen=max(1, int(buffer_seconds * rate / frame_samples)))
+        self._next_index = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._audio = None
+        self._stream = None
+        self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def position(self) -> int:
+        """Index of the next frame that will be read from the device."""
+        with self._condition:
+            return self._next_index
+
+    def start(self) -> None:
+        if self._running:
+            return
+        import pyaudio
+
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.rate,
+            input=True,
+            frames_per_buffer=self.frame_samples,
+            input_device_index=self.device_index
+        )
+        self._running = True
+        self._thread = threading.Thread(target=self._reader, daemon=True, name="ultra-microphone")
+        self._thread.start()
+
+    def close(self) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+    def _reader(self) -> None:
+        while self._running:
+            try:
+                frame = self._stream.read(self.frame_samples, exception_on_overflow=False)
+            except OSError as e:
+                print(f"Microphone read failed: {e}")
+                break
+            with self._condition:
+                self._frames.append(frame)
+                self._next_index += 1
+                self._condition.notify_all()
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+    def frames_since(self, index: int) -> Iterator[bytes]:
+        """Yield frames starting at the given index, blocking for new ones until the stream closes."""
+        while True:
+            with self._condition:
+                while index >= self._next_index and self._running:
+                    self._condition.wait()
+                if index >= self._next_index:
+                    return
+                oldest = self._next_index - len(self._frames)
+                if index < oldest:
+                    self.dropped_frames += oldest - index
+                    index = oldest
+                frame = self._frames[index - oldest]
+            index += 1
+            yield frame
+
+    def frames_before(self, index: int, count: int) -> List[bytes]:
+        """Return up to count buffered frames that came before the given index, without blocking."""
+        with self._condition:
+            oldest = self._next_index - len(self._frames)
+            end = min(index, self._next_index)
+            start = max(oldest, end - count)
+            return [self._frames[i - oldest] for i in range(start, end)]
+
+    def samples_since(self, index: int) -> Iterator[np.ndarray]:
+        """Like frames_since(), as int16 sample arrays."""
+        for frame in self.frames_since(index):
+            yield np.frombuffer(frame, dtype=np.int16)
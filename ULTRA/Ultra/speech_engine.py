@@ -0,0 +1,195 @@
+import collections
+import os
+import threading
+import time
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+MODEL_SIZES = ("tiny", "base", "small")
+SAMPLE_RATE = 16000
+
+
+def audio_data_to_pcm(audio) -> np.ndarray:
+    """
+    Convert a speech_recognition AudioData into float32 mono samples at 16 kHz.
+
+    When the microphone already records 16-bit audio at 16 kHz the raw frames are
+    viewed in place, so the only copy is the int16 -> float32 scaling.
+    """
+    raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def save_debug_audio(audio, file_path: str = "captured_audio.wav") -> None:
+    """Dump the captured audio to a WAV file for debugging recognition problems."""
+    with open(file_path, "wb") as f:
+        f.write(audio.get_wav_data())
+
+
+def get_process_rss_mb() -> Optional[float]:
+    """Return the resident set size of this process in MB, or None if it can't be read."""
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class TranscriptionEngine:
+    """
+    A Whisper model that is loaded once and kept resident for every transcription.
+
+    Loading happens in a background thread so startup isn't blocked; transcribe()
+    waits for the model if it is still loading. Calls are serialized with a lock
+    because a Whisper model is not safe to use from several threads at once.
+
+    Only the last max_stats calls are kept for get_stats(). Partial passes make
+    calls frequent, so the first call is printed and after that a summary at
+    most every report_interval seconds.
+    """
+
+    def __init__(self, model_size: str = "small", max_stats: int = 1000, report_interval: Optional[float] = 60):
+        if model_size not in MODEL_SIZES:
+            raise ValueError(f"Unknown Whisper model size '{model_size}', expected one of {', '.join(MODEL_SIZES)}")
+
+        self.model_size = model_size
+        self.model = None
+        self.load_error = None
+        self.load_time = None
+        self.warmup_time = None
+        self.report_interval = report_interval
+        self.calls = 0
+        self.first_call_latency: Optional[float] = None
+        self.stats: Deque[Dict[str, Optional[float]]] = collections.deque(maxlen=max_stats)
+        self._last_report = 0.0
+
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._load_thread = None
+
+    def load_in_background(self) -> None:
+        """Start loading the model in a daemon thread if it isn't loaded or loading already."""
+        if self._ready.is_set() or self._load_thread is not None:
+            return
+        self._load_thread = threading.Thread(target=self._load, daemon=True)
+        self._load_thread.start()
+
+    def _load(self) -> None:
+        try:
+            import whisper
+
+            rss_before = get_process_rss_mb()
+            start_time = time.perf_counter()
+            model = whisper.load_model(self.model_size)
+            self.load_time = time.perf_counter() - start_time
+
+            # Run one pass on a second of silence so the first real utterance
+            # doesn't pay for lazy initialization inside torch.
+            start_time = time.perf_counter()
+            model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), fp16=False)
+            self.warmup_time = time.perf_counter() - start_time
+
+            self.model = model
+            rss_after = get_process_rss_mb()
+            print(f"Whisper '{self.model_size}' model loaded in {self.load_time:.2f}s, "
+                  f"warm-up {self.warmup_time:.2f}s, RSS {_format_mb(rss_before)} -> {_format_mb(rss_after)}")
+        except Exception as e:
+            self.load_error = e
+            print(f"Failed to load Whisper '{self.model_size}' model: {e}")
+        finally:
+            self._ready.set()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model has finished loading. Returns False on timeout."""
+        self.load_in_background()
+        return self._ready.wait(timeout)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set() and self.model is not None
+
+    def transcribe(self, pcm, **options) -> Dict:
+        """
+        Transcribe audio with the resident model.
+
+        Args:
+            pcm: float32 mono samples at 16 kHz, or a path to an audio file
+            **options: Extra keyword arguments passed to whisper's transcribe()
+
+        Returns:
+            The whisper result dictionary (with "text", "language", "segments")
+        """
+        self.wait_until_ready()
+        if self.model is None:
+            raise RuntimeError(f"Whisper '{self.model_size}' model is not available: {self.load_error}")
+
+        options.setdefault("fp16", False)
+        with self._lock:
+            start_time = time.perf_counter()
+            result = self.model.transcribe(pcm, **options)
+            latency = time.perf_counter() - start_time
+
+        audio_seconds = len(pcm) / SAMPLE_RATE if isinstance(pcm, np.ndarray) else None
+        call_stats = {
+            "latency": latency,
+            "audio_seconds": audio_seconds,
+            "rss_mb": get_process_rss_mb(),
+        }
+        self.stats.append(call_stats)
+        self.calls += 1
+        if self.first_call_latency is None:
+            self.first_call_latency = latency
+            self._last_report = time.monotonic()
+            print(f"Whisper '{self.model_size}' first transcription took {latency:.2f}s, "
+                  f"RSS {_format_mb(call_stats['rss_mb'])}")
+        elif self.report_interval and time.monotonic() - self._last_report >= self.report_interval:
+            self._last_report = time.monotonic()
+            stats = self.get_stats()
+            print(f"Whisper '{self.model_size}': {stats['calls']} transcriptions, mean {stats['mean_latency']:.2f}s "
+                  f"over the last {len(self.stats)}, RSS {_format_mb(stats['last_rss_mb'])}")
+        return result
+
+    def detect_language(self, pcm: np.ndarray, seconds: float = 3.0) -> Tuple[str, Dict[str, float]]:
+        """
+        Identify the spoken language from the first seconds of audio.
+
+        Returns the most likely language code and the probability of every
+        language. Only one encoder pass is run, with no decoding, so this is
+        much cheaper than a transcription.
+        """
+        import whisper
+
+        self.wait_until_ready()
+        if self.model is None:
+            raise RuntimeError(f"Whisper '{self.model_size}' model is not available: {self.load_error}")
+
+        clip = whisper.pad_or_trim(pcm[:int(seconds * SAMPLE_RATE)])
+        mel = whisper.log_mel_spectrogram(clip, n_mels=self.model.dims.n_mels).to(self.model.device)
+        with self._lock:
+            _, probabilities = self.model.detect_language(mel)
+        return max(probabilities, key=probabilities.get), probabilities
+
+    def get_stats(self) -> Dict:
+        """Summarize cold-start cost, and per-call latency over the recent calls."""
+        latencies = [s["latency"] for s in self.stats]
+        return {
+            "model_size": self.model_size,
+            "load_time": self.load_time,
+            "warmup_time": self.warmup_time,
+            "calls": self.calls,
+            "first_call_latency": self.first_call_latency,
+            "mean_latency": sum(latencies) / len(latencies) if latencies else None,
+            "last_rss_mb": self.stats[-1]["rss_mb"] if self.stats else get_process_rss_mb(),
+        }
+
+
+def _format_mb(value: Optional[float]) -> str:
+    return f"{value:.0f} MB" if value is not None else "n/a"
@@ -0,0 +1,160 @@
+import queue
+import re
+import threading
+import time
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+# A sentence ends with terminal punctuation followed by whitespace, so decimals
+# like "3.5" and abbreviations glued to the next word are not split.
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+|\n+')
+
+
+def split_sentences(text: str) -> Tuple[List[str], str]:
+    """Split text into complete sentences and the unfinished remainder."""
+    parts = SENTENCE_BOUNDARY.split(text)
+    remainder = parts.pop()
+    return [part.strip() for part in parts if part.strip()], remainder
+
+
+class SpeechClip:
+    """Audio chunks for one sentence that can be played while they are still arriving."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._complete = False
+        self._condition = threading.Condition()
+
+    def append(self, chunk: bytes) -> None:
+        with self._condition:
+            self._chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self) -> None:
+        with self._condition:
+            self._complete = True
+            self._condition.notify_all()
+
+    def __iter__(self) -> Iterator[bytes]:
+        index = 0
+        while True:
+            with self._condition:
+                while index >= len(self._chunks) and not self._complete:
+                    self._condition.wait()
+                if index >= len(self._chunks):
+                    return
+                chunk = self._chunks[index]
+            index += 1
+            yield chunk
+
+
+class SentenceSpeaker:
+    """
+    Speak a response sentence by sentence while it is still being generated.
+
+    Text deltas go in through feed(). Every complete sentence is handed to a
+    synthesis thread, which queues a SpeechClip for the playback thread right
+    away and fills it as the audio downloads. Playback of a sentence starts with
+    its first chunk, and the next sentence downloads while the current one plays.
+    """
+
+    def __init__(self, synthesize: Callable[[str], Iterable[bytes]], play: Callable[[Iterable[bytes]], None]):
+        self.synthesize = synthesize
+        self.play = play
+        self.started_at = time.perf_counter()
+        self.first_audio_at = None
+
+        self._buffer = ""
+        self._sentences = queue.Queue()
+        self._clips = queue.Queue()
+        self._cancelled = threading.Event()
+        self._finished = False
+
+        self._synthesis_thread = threading.Thread(target=self._synthesis_worker, daemon=True)
+        self._playback_thread = threading.Thread(target=self._playback_worker, daemon=True)
+        self._synthesis_thread.start()
+        self._playback_thread.start()
+
+    def feed(self, text_delta: str) -> None:
+        """Add streamed text and dispatch any sentences it completes."""
+        self._buffer += text_delta
+
+        # Tool results that reach the user verbatim are JSON payloads, not
+        # speech; hold them back until finish() so the caller can decide.
+        if self._buffer.lstrip().startswith("{"):
+            return
+
+        sentences, self._buffer = split_sentences(self._buffer)
+        for sentence in sentences:
+            self._sentences.put(sentence)
+
+    def finish(self) -> None:
+        """Dispatch whatever text is left; no more text will be fed after this."""
+        if self._finished:
+            return
+        self._finished = True
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        if remainder:
+            self._sentences.put(remainder)
+        self._sentences.put(None)
+
+    def cancel(self) -> None:
+        """Drop everything that hasn't been played yet."""
+        self._cancelled.set()
+        self._buffer = ""
+        if not self._finished:
+            self._finished = True
+            self._sentences.put(None)
+
+    def wait(self) -> None:
+        """Block until every dispatched sentence has been played."""
+        self._playback_thread.join()
+
+    @property
+    def time_to_first_audio(self):
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.started_at
+
+    def _synthesis_worker(self) -> None:
+        while True:
+            sentence = self._sentences.get()
+            if sentence is None:
+                self._clips.put(None)
+                return
+            if self._cancelled.is_set():
+                continue
+            clip = SpeechClip()
+            self._clips.put(clip)
+            try:
+                for chunk in self.synthesize(sentence):
+                    if self._cancelled.is_set():
+                        break
+                    clip.append(chunk)
+            except Exception as e:
+                print(f"An error occurred: {e}")
+            finally:
+                clip.finish()
+
+    def _playback_worker(self) -> None:
+        while True:
+            clip = self._clips.get()
+            if clip is None:
+                return
+            if self._cancelled.is_set():
+                continue
+            try:
+                self.play(self._timed(clip))
+            except Exception as e:
+                print(f"An error occurred: {e}")
+
+    def _timed(self, clip: SpeechClip) -> Iterator[bytes]:
+        """Pass a clip's chunks through, noting when the first chunk of the response plays."""
+        for chunk in clip:
+            if self._cancelled.is_set():
+                return
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+                print("[Ultra is speaking a response...]")
+                print(f"Time to first audio: {self.time_to_first_audio:.2f}s")
+            yield chunk
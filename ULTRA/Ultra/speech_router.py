@@ -0,0 +1,193 @@
+import collections
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from speech_engine import SAMPLE_RATE, TranscriptionEngine
+
+
+class RecognitionRouter:
+    """
+    Decide how to transcribe each command, locally first.
+
+    A small resident Whisper model identifies the language from the first
+    seconds of audio. The user's recent languages act as a prior: when the
+    detector isn't confident, a language they used recently and that scores
+    at least prior_floor wins, so short commands don't flip language. The
+    command is then transcribed by the main Whisper model with the language
+    fixed. The remote recognizer is only used for the languages listed in
+    remote_languages, and only when one is configured; if it fails, the local
+    model is used after all.
+    """
+
+    def __init__(self, engine: TranscriptionEngine, language_engine: Optional[TranscriptionEngine] = None,
+                 remote: Optional[Callable[[object, str], str]] = None,
+                 remote_languages: Optional[Dict[str, str]] = None, detect_seconds: float = 3.0,
+                 confidence: float = 0.6, prior_floor: float = 0.15, history: int = 5):
+        self.engine = engine
+        self.language_engine = language_engine or engine
+        self.remote = remote
+        self.remote_languages = remote_languages or {}
+        self.detect_seconds = detect_seconds
+        self.confidence = confidence
+        self.prior_floor = prior_floor
+        self.recent_languages = collections.deque(maxlen=history)
+
+    def load_in_background(self) -> None:
+        self.engine.load_in_background()
+        self.language_engine.load_in_background()
+
+    def choose_language(self, pcm: np.ndarray) -> Dict:
+        """Detect the language of pcm, falling back to the user's recent language when unsure."""
+        start_time = time.perf_counter()
+        language, probabilities = self.language_engine.detect_language(pcm, self.detect_seconds)
+        probability = probabilities[language]
+
+        if probability < self.confidence and self.recent_languages:
+            recent = collections.Counter(self.recent_languages).most_common(1)[0][0]
+            if probabilities.get(recent, 0.0) >= self.prior_floor:
+                language = recent
+        return {
+            "language": language,
+            "probability": probabilities.get(language, 0.0),
+            "detect_time": time.perf_counter() - start_time,
+        }
+
+    def start_partial(self, interval: float = 1.0) -> "PartialTranscription":
+        """Begin transcribing a command that is still being recorded (local model only)."""
+        return PartialTranscription(self, interval)
+
+    def recognize(self, pcm: np.ndarray, audio=None) -> Dict:
+        """
+        Transcribe one command.
+
+        Args:
+            pcm: float32 mono samples at 16 kHz
+            audio: The same audio as a speech_recognition AudioData, for the remote recognizer
+
+        Returns:
+            A dictionary with "text", "language", "route" ("local" or "remote") and timings
+        """
+        result = self.choose_language(pcm)
+        language = result["language"]
+        self.recent_languages.append(language)
+
+        start_time = time.perf_counter()
+        remote_code = self.remote_languages.get(language)
+        if self.remote and remote_code and audio is not None:
+            try:
+                result.update(text=self.remote(audio, remote_code), route="remote")
+            except Exception as e:
+                print(f"Remote recognition failed, transcribing locally: {e}")
+        if "text" not in result:
+            transcription = self.engine.transcribe(pcm, language=language)
+            result.update(text=transcription["text"], route="local")
+        result["recognize_time"] = time.perf_counter() - start_time
+
+        print(f"Recognized {result['language']} ({result['probability']:.0%}) via {result['route']} in "
+              f"{result['detect_time'] + result['recognize_time']:.2f}s")
+        return result
+
+
+class PartialTranscription:
+    """
+    Transcribe a command while it is still being spoken.
+
+    feed() takes int16 audio as it is recorded. Every interval seconds a
+    worker thread transcribes the audio that isn't committed yet and prints
+    the partial transcript as "[Ultra is hearing: ...]". A segment is
+    committed (its text and audio set aside for good) once two consecutive
+    passes agree on it and it ends at least holdback seconds before the end
+    of the audio, since Whisper keeps revising the last words. finish() then
+    only has to transcribe the audio after the last committed segment, with
+    the committed text as the prompt.
+    """
+
+    def __init__(self, router: RecognitionRouter, interval: float = 1.0, holdback: float = 1.0,
+                 min_audio: float = 0.5):
+        self.router = router
+        self.interval = interval
+        self.holdback = holdback
+        self.min_audio = min_audio
+        self.language_result: Optional[Dict] = None
+        self.passes = 0
+
+        self._audio: List[np.ndarray] = []
+        self._committed: List[str] = []
+        self._committed_samples = 0
+        self._previous_segments: List[str] = []
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._worker, daemon=True, name="ultra-partial-transcription")
+        self._thread.start()
+
+    @property
+    def committed_text(self) -> str:
+        return " ".join(self._committed)
+
+    def feed(self, samples: np.ndarray) -> None:
+        with self._lock:
+            self._audio.append(samples)
+
+    def _pending_audio(self) -> np.ndarray:
+        with self._lock:
+            audio = np.concatenate(self._audio) if self._audio else np.zeros(0, dtype=np.int16)
+        return audio[self._committed_samples:].astype(np.float32) / 32768.0
+
+    def _transcribe(self, pcm: np.ndarray) -> Dict:
+        if self.language_result is None:
+            self.language_result = self.router.choose_language(pcm)
+        return self.router.engine.transcribe(
+            pcm,
+            language=self.language_result["language"],
+            initial_prompt=self.committed_text or None,
+            condition_on_previous_text=False
+        )
+
+    def _worker(self) -> None:
+        while not self._finished.wait(self.interval):
+            pcm = self._pending_audio()
+            if len(pcm) < self.min_audio * SAMPLE_RATE:
+                continue
+            result = self._transcribe(pcm)
+            self.passes += 1
+            self._commit(result["segments"], len(pcm) / SAMPLE_RATE)
+            partial = " ".join(self._committed + self._previous_segments)
+            print(f"[Ultra is hearing: {partial.replace('[', '(').replace(']', ')')}]", flush=True)
+
+    def _commit(self, segments: List[Dict], duration: float) -> None:
+        """Commit the leading segments that the previous pass agreed on."""
+        texts = [segment["text"].strip() for segment in segments]
+        agreed = 0
+        for text, previous, segment in zip(texts, self._previous_segments, segments):
+            if text != previous or segment["end"] > duration - self.holdback:
+                break
+            agreed += 1
+        if agreed:
+            self._committed.extend(texts[:agreed])
+            self._committed_samples += int(segments[agreed - 1]["end"] * SAMPLE_RATE)
+        self._previous_segments = texts[agreed:]
+
+    def cancel(self) -> None:
+        """Stop the partial passes without a final transcription."""
+        self._finished.set()
+
+    def finish(self) -> Dict:
+        """Stop the partial passes and transcribe what is left; returns the same shape as recognize()."""
+        self._finished.set()
+        self._thread.join()
+
+        start_time = time.perf_counter()
+        pcm = self._pending_audio()
+        texts = list(self._committed)
+        if len(pcm) or self.language_result is None:
+            texts.append(self._transcribe(pcm)["text"].strip())
+        result = dict(self.language_result, text=" ".join(filter(None, texts)), route="local", partial_passes=self.passes,
+                      recognize_time=time.perf_counter() - start_time)
+        self.router.recent_languages.append(result["language"])
+
+        print(f"Recognized {result['language']} ({result['probability']:.0%}) after {self.passes} partial passes, "
+              f"final pass {result['recognize_time']:.2f}s")
+        return result
@@ -0,0 +1,204 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class SpotifyStateService:
+    """
+    One shared view of Spotify's playback state, so a turn doesn't keep asking.
+
+    snapshot() fetches current_playback() at most once per ttl seconds, and
+    concurrent callers wait for the fetch already in flight instead of starting
+    their own. Changes Ultra makes itself (pause, resume, volume) are applied to
+    the snapshot right away, so it stays accurate without a re-fetch.
+
+    Volume changes are coalesced: set_volume() only records the target and a
+    worker sends the latest one after volume_delay seconds, so a duck
+    immediately followed by a restore costs one request (or none, if the
+    volume ends up where it was).
+
+    The OAuth token is refreshed by a background thread token_refresh_margin
+    seconds before it expires, instead of inline on the first call after
+    expiry.
+    """
+
+    def __init__(self, client_factory: Callable, ttl: float = 3.0, volume_delay: float = 0.15,
+                 token_refresh_margin: float = 300):
+        self.client_factory = client_factory
+        self.ttl = ttl
+        self.volume_delay = volume_delay
+        self.token_refresh_margin = token_refresh_margin
+
+        self.fetches = 0
+        self.volume_requests = 0
+        self.volume_changes_coalesced = 0
+
+        self._client = None
+        self._snapshot: Optional[Dict] = None
+        self._fetched_at = 0.0
+        self._fetch_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        self._volume_target: Optional[int] = None
+        self._volume_sent: Optional[int] = None
+        self._volume_condition = threading.Condition(self._lock)
+        self._volume_thread = threading.Thread(target=self._volume_worker, daemon=True, name="ultra-spotify-volume")
+        self._volume_thread.start()
+        self._token_thread = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self.client_factory()
+        return self._client
+
+    def snapshot(self, max_age: Optional[float] = None) -> Optional[Dict]:
+        """
+        Return {"is_playing", "volume", "device_id", "track_uri"}, or None when
+        nothing is playing on any device. Raises if the Web API call fails.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            if self._fetched_at and time.monotonic() - self._fetched_at <= max_age:
+                return dict(self._snapshot) if self._snapshot else None
+            fetched_at = self._fetched_at
+
+        with self._fetch_lock:
+            with self._lock:
+                # Someone else fetched while we waited for the lock
+                if self._fetched_at != fetched_at:
+                    return dict(self._snapshot) if self._snapshot else None
+            playback = self.client.current_playback()
+            self.fetches += 1
+            with self._lock:
+                self._snapshot = _parse_playback(playback)
+                self._fetched_at = time.monotonic()
+                if self._snapshot and self._volume_target is None:
+                    self._volume_sent = self._snapshot["volume"]
+                return dict(self._snapshot) if self._snapshot else None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._fetched_at = 0.0
+
+    def is_playing(self) -> Optional[bool]:
+        snapshot = self.snapshot()
+        return snapshot["is_playing"] if snapshot else None
+
+    def volume(self) -> Optional[int]:
+        """The volume Spotify is at, or about to be at once a pending change is sent."""
+        snapshot = self.snapshot()
+        with self._lock:
+            if self._volume_target is not None:
+                return self._volume_target
+        return snapshot["volume"] if snapshot else None
+
+    def pause(self) -> None:
+        self.client.pause_playback()
+        self._update(is_playing=False)
+
+    def resume(self) -> None:
+        self.client.start_playback()
+        self._update(is_playing=True)
+
+    def play(self, uris: List[str]) -> None:
+        self.client.start_playback(uris=uris)
+        self._update(is_playing=True, track_uri=uris[0] if uris else None)
+
+    def _update(self, **changes) -> None:
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot.update(changes)
+            else:
+                self._fetched_at = 0.0  # Playback just started somewhere; learn the device next time
+
+    def set_volume(self, volume_percent: int) -> None:
+        """Queue a volume change; only the latest target within volume_delay is sent."""
+        with self._lock:
+            if self._volume_target is not None:
+                self.volume_changes_coalesced += 1
+            self._volume_target = int(volume_percent)
+            if self._snapshot is not None:
+                self._snapshot["volume"] = self._volume_target
+            self._volume_condition.notify()
+
+    def flush_volume(self, timeout: float = 2.0) -> None:
+        """Wait until any queued volume change has been sent."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._volume_target is not None and time.monotonic() < deadline:
+                self._volume_condition.wait(0.05)
+
+    def _volume_worker(self) -> None:
+        while True:
+            with self._lock:
+                while self._volume_target is None:
+                    self._volume_condition.wait()
+            time.sleep(self.volume_delay)  # Let a quick duck-and-restore collapse into one change
+            with self._lock:
+                target = self._volume_target
+                if target is None:
+                    continue
+                needed = target != self._volume_sent
+            if needed:
+                try:
+                    self.client.volume(target)
+                    self.volume_requests += 1
+                    with self._lock:
+                        self._volume_sent = target
+                except Exception as e:
+                    print(f"Failed to set Spotify volume: {e}")
+                    self.invalidate()
+            with self._lock:
+                if self._volume_target == target:
+                    self._volume_target = None
+                self._volume_condition.notify_all()
+
+    def start_token_refresh(self) -> None:
+        """Keep the OAuth token fresh from a daemon thread."""
+        if self._token_thread is None:
+            self._token_thread = threading.Thread(target=self._token_worker, daemon=True,
+                                                  name="ultra-spotify-token")
+            self._token_thread.start()
+
+    def _token_worker(self) -> None:
+        while True:
+            try:
+                auth_manager = self.client.auth_manager
+                token_info = auth_manager.cache_handler.get_cached_token()
+            except Exception as e:
+                print(f"Spotify token refresh unavailable: {e}")
+                return
+            if not token_info or "refresh_token" not in token_info:
+                time.sleep(60)  # Not authorized yet; the first API call does that interactively
+                continue
+
+            wait = token_info["expires_at"] - self.token_refresh_margin - time.time()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            try:
+                auth_manager.refresh_access_token(token_info["refresh_token"])
+            except Exception as e:
+                print(f"Failed to refresh the Spotify token: {e}")
+                time.sleep(30)
+
+    def get_stats(self) -> Dict:
+        return {
+            "fetches": self.fetches,
+            "volume_requests": self.volume_requests,
+            "volume_changes_coalesced": self.volume_changes_coalesced,
+        }
+
+
+def _parse_playback(playback) -> Optional[Dict]:
+    if not playback:
+        return None
+    device = playback.get("device") or {}
+    item = playback.get("item") or {}
+    return {
+        "is_playing": bool(playback.get("is_playing")),
+        "volume": device.get("volume_percent"),
+        "device_id": device.get("id"),
+        "track_uri": item.get("uri"),
+    }
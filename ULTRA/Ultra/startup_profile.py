@@ -0,0 +1,71 @@
+import builtins
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+PROCESS_START = time.perf_counter()
+
+
+class ImportTimer:
+    """
+    Measure how long each top-level module takes to import.
+
+    While installed, builtins.__import__ is wrapped so every import of a module
+    that isn't loaded yet is timed. Nested imports are charged to the outermost
+    one, per thread, so "openai" includes httpx, pydantic and the rest of what
+    it pulls in. Imports done by the background warm-up are tagged with that
+    thread's name, which shows what was moved off the startup path.
+    """
+
+    def __init__(self):
+        self.timings: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._original_import = None
+        self._local = threading.local()
+
+    def install(self) -> None:
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules or getattr(self._local, "depth", 0):
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._local.depth = 1
+        start_time = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._local.depth = 0
+            self.timings[(threading.current_thread().name, name.split('.')[0])] += time.perf_counter() - start_time
+
+    def report(self, limit: int = 20) -> str:
+        rows: List[Tuple[float, str, str]] = sorted(
+            ((seconds, thread, module) for (thread, module), seconds in self.timings.items()), reverse=True
+        )
+        lines = [f"{'module':<28} {'thread':<22} {'ms':>8}"]
+        for seconds, thread, module in rows[:limit]:
+            lines.append(f"{module:<28} {thread:<22} {seconds * 1000:8.1f}")
+        main_total = sum(seconds for (thread, _), seconds in self.timings.items() if thread == "MainThread")
+        lines.append(f"{'total on the main thread':<51} {main_total * 1000:8.1f}")
+        return "\n".join(lines)
+
+
+import_timer = ImportTimer()
+
+
+def import_report_requested() -> bool:
+    return "--import-time" in sys.argv or os.environ.get("ULTRA_IMPORT_TIME") == "1"
+
+
+def seconds_since_start() -> float:
+    return time.perf_counter() - PROCESS_START
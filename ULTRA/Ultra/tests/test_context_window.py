@@ -0,0 +1,79 @@
+import json
+
+from context_window import ContextWindow
+
+
+def conversation(count):
+    history = [{"role": "system", "content": "You are Ultra."}]
+    for i in range(count):
+        history.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"})
+    return history
+
+
+class RecordingSummarizer:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, previous_summary, messages):
+        self.batches.append([message["content"] for message in messages])
+        if self.fail:
+            raise RuntimeError("context length exceeded")
+        return f"{previous_summary or ''}|{len(messages)}"
+
+
+def build_and_wait(window, history):
+    window.build(history, [], "question")
+    if window._summary_thread is not None:
+        window._summary_thread.join(5)
+
+
+def test_backlog_is_summarized_in_batches(tmp_path):
+    summarizer = RecordingSummarizer()
+    window = ContextWindow(summarizer, keep_last_messages=4, summarize_batch=8,
+                           state_path=str(tmp_path / "summary.json"))
+
+    build_and_wait(window, conversation(30))
+
+    assert [len(batch) for batch in summarizer.batches] == [8, 8, 8, 2]
+    assert window.summarized_count == 26
+
+
+def test_summary_survives_a_restart(tmp_path):
+    state_path = str(tmp_path / "summary.json")
+    build_and_wait(ContextWindow(RecordingSummarizer(), keep_last_messages=4, state_path=state_path),
+                   conversation(30))
+
+    summarizer = RecordingSummarizer()
+    restarted = ContextWindow(summarizer, keep_last_messages=4, state_path=state_path)
+    build_and_wait(restarted, conversation(40))
+
+    assert restarted.summarized_count == 36
+    # Only the messages added since the restart are summarized
+    assert summarizer.batches == [[f"message {i}" for i in range(26, 34)], ["message 34", "message 35"]]
+    with open(state_path, encoding="utf-8") as file:
+        assert json.load(file)["summarized_count"] == 36
+
+
+def test_saved_summary_for_a_different_history_is_dropped(tmp_path):
+    state_path = str(tmp_path / "summary.json")
+    build_and_wait(ContextWindow(RecordingSummarizer(), keep_last_messages=4, state_path=state_path),
+                   conversation(30))
+
+    other_history = [{"role": "system", "content": "You are Ultra."}] + \
+                    [{"role": "user", "content": f"other {i}"} for i in range(12)]
+    restarted = ContextWindow(RecordingSummarizer(), keep_last_messages=4, state_path=state_path)
+    messages = restarted.build(other_history, [], "question")
+
+    assert not any("Summary of the earlier conversation" in message["content"] for message in messages)
+
+
+def test_a_failed_summary_is_not_retried_every_turn():
+    summarizer = RecordingSummarizer(fail=True)
+    window = ContextWindow(summarizer, keep_last_messages=4, summarize_batch=8, retry_delay=60)
+
+    build_and_wait(window, conversation(30))
+    build_and_wait(window, conversation(32))
+
+    assert len(summarizer.batches) == 1
+    assert window.summary is None
@@ -0,0 +1,65 @@
+import pytest
+
+from math_engine import MathEngine, NotNumeric, evaluate_numeric, normalize
+
+
+@pytest.mark.parametrize("task, expected", [
+    ("2*3+4", "10"),
+    ("128 / 4", "32"),
+    ("2^10", "1024"),
+    ("100/7", "14.2857142857143"),
+    ("sqrt(144)", "12"),
+    ("sqrt(2)**2", "2"),
+    ("(17+23)*4/5", "32"),
+    ("72 * 1.8 + 32", "161.6"),
+    ("factorial(20)", "2432902008176640000"),
+    ("2*pi", "6.28318530717959"),
+])
+def test_plain_arithmetic_takes_the_fast_path(task, expected):
+    engine = MathEngine()
+    assert engine.evaluate(task) == expected
+    assert engine.fast_path_hits == 1
+    assert engine.sympy_evaluations == 0
+
+
+def test_results_are_cached_by_normalized_task():
+    engine = MathEngine()
+    engine.evaluate("2 * 3 + 4")
+    engine.evaluate("2*3+4")
+    assert normalize(" 2 ^ 3 ") == "2**3"
+    assert engine.cache_info().hits == 1
+
+
+@pytest.mark.parametrize("expression", [
+    "sin(pi)",  # 1.2e-16 in floating point, 0 in SymPy
+    "cos(pi/2)",
+    "log(1000, 10)",
+    "exp(1)",
+    "1e308*10",  # inf
+    "1e999",
+    "factorial(2000)",  # Too many digits for str()
+    "2**4000*2**4000",
+    "10**10**10",
+    "(-8)**(1/3)",  # complex
+    "1/0",
+    "sqrt(-1)",
+    "x+1",
+])
+def test_inputs_the_fast_path_would_get_wrong_are_left_to_sympy(expression):
+    with pytest.raises(NotNumeric):
+        evaluate_numeric(expression)
+
+
+@pytest.mark.parametrize("task, expected", [
+    ("sin(pi)", "0"),
+    ("cos(pi/2)", "0"),
+    ("2*x+3=11", "[4]"),
+])
+def test_sympy_fallback(task, expected):
+    pytest.importorskip("sympy")
+    assert MathEngine().evaluate(task) == expected
+
+
+def test_huge_results_fall_back_to_a_sympy_float():
+    pytest.importorskip("sympy")
+    assert MathEngine().evaluate("factorial(2000)").startswith("3.31627509245063e+5735")
@@ -0,0 +1,45 @@
+import json
+
+from memory_store import MemoryStore
+
+
+def write_legacy_file(path):
+    path.write_text(json.dumps([
+        {"data": "My wife's birthday is on March 3rd", "store_time": "2024-01-01"},
+        {"data": "I like jazz in the morning", "store_time": "2024-01-02"},
+    ]))
+
+
+def test_legacy_file_is_imported_once(tmp_path):
+    legacy = tmp_path / "memory.txt"
+    write_legacy_file(legacy)
+
+    store = MemoryStore(str(tmp_path / "memory.db"), legacy_file_path=str(legacy))
+    assert store.count() == 2
+    store.clear()
+
+    reopened = MemoryStore(str(tmp_path / "memory.db"), legacy_file_path=str(legacy))
+    assert reopened.count() == 0
+
+
+def test_existing_database_is_not_imported_into_again(tmp_path):
+    legacy = tmp_path / "memory.txt"
+    write_legacy_file(legacy)
+    store = MemoryStore(str(tmp_path / "memory.db"))
+    store.store("I like jazz in the morning", "2024-01-02")
+
+    reopened = MemoryStore(str(tmp_path / "memory.db"), legacy_file_path=str(legacy))
+    assert reopened.count() == 1
+
+
+def test_search_finds_memories_past_buffer_growth(tmp_path):
+    store = MemoryStore(str(tmp_path / "memory.db"))
+    for i in range(40):
+        store.store(f"Filler note number {i} about groceries", "2024-01-01")
+    store.store("My wife's birthday is on March 3rd", "2024-02-01")
+
+    results = store.search("When is my wife's birthday?", k=1)
+    assert results[0]["data"] == "My wife's birthday is on March 3rd"
+
+    reopened = MemoryStore(str(tmp_path / "memory.db"))
+    assert reopened.search("When is my wife's birthday?", k=1)[0]["data"] == "My wife's birthday is on March 3rd"
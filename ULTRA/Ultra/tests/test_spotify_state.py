@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from fake_servers import FakeServer
+from spotify_state import SpotifyStateService
+
+
+@pytest.fixture
+def spotify_server():
+    """A fake Spotify Web API player endpoint; GET /v1/me/player is slow, like the real one."""
+    player = {"is_playing": True, "device": {"id": "desk", "volume_percent": 50},
+              "item": {"uri": "spotify:track:1"}}
+
+    def handle(method, path, body):
+        url = urllib.parse.urlparse(path)
+        if method == "GET" and url.path == "/v1/me/player":
+            time.sleep(0.2)
+            return 200, player
+        if method == "PUT" and url.path == "/v1/me/player/volume":
+            player["device"]["volume_percent"] = int(urllib.parse.parse_qs(url.query)["volume_percent"][0])
+            return 204, None
+        if method == "PUT" and url.path in ("/v1/me/player/pause", "/v1/me/player/play"):
+            player["is_playing"] = url.path.endswith("play")
+            return 204, None
+        return 404, {"error": "not found"}
+
+    with FakeServer(handle) as server:
+        server.player = player
+        yield server
+
+
+class WebAPIClient:
+    """The few spotipy.Spotify calls SpotifyStateService makes, against the fake server."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def _request(self, method, path):
+        request = urllib.request.Request(self.url + path, method=method, data=b"" if method == "PUT" else None)
+        with urllib.request.urlopen(request, timeout=5) as response:
+            body = response.read()
+        return json.loads(body) if body else None
+
+    def current_playback(self):
+        return self._request("GET", "/v1/me/player")
+
+    def volume(self, volume_percent):
+        self._request("PUT", f"/v1/me/player/volume?volume_percent={volume_percent}")
+
+    def pause_playback(self):
+        self._request("PUT", "/v1/me/player/pause")
+
+    def start_playback(self, uris=None):
+        self._request("PUT", "/v1/me/player/play")
+
+
+def test_concurrent_reads_share_one_snapshot_request(spotify_server):
+    state = SpotifyStateService(lambda: WebAPIClient(spotify_server.url), ttl=5)
+    snapshots = []
+
+    threads = [threading.Thread(target=lambda: snapshots.append(state.snapshot())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert spotify_server.request_count("/v1/me/player") == 1
+    assert state.fetches == 1
+    assert all(snapshot == {"is_playing": True, "volume": 50, "device_id": "desk",
+                            "track_uri": "spotify:track:1"} for snapshot in snapshots)
+
+
+def test_pause_updates_the_snapshot_without_a_refetch(spotify_server):
+    state = SpotifyStateService(lambda: WebAPIClient(spotify_server.url), ttl=5)
+    state.snapshot()
+
+    state.pause()
+
+    assert state.is_playing() is False
+    assert spotify_server.player["is_playing"] is False
+    assert state.fetches == 1
+
+
+def test_volume_changes_are_coalesced(spotify_server):
+    state = SpotifyStateService(lambda: WebAPIClient(spotify_server.url), ttl=5, volume_delay=0.1)
+    state.snapshot()
+
+    for volume in (40, 30, 20):
+        state.set_volume(volume)
+    state.flush_volume()
+
+    assert spotify_server.request_count("/v1/me/player/volume") == 1
+    assert spotify_server.player["device"]["volume_percent"] == 20
+    assert state.volume_changes_coalesced == 2
+
+
+def test_duck_and_restore_within_the_delay_sends_nothing(spotify_server):
+    state = SpotifyStateService(lambda: WebAPIClient(spotify_server.url), ttl=5, volume_delay=0.1)
+    state.snapshot()
+
+    state.set_volume(30)
+    state.set_volume(50)
+    state.flush_volume()
+
+    assert spotify_server.request_count("/v1/me/player/volume") == 0
+    assert state.volume() == 50
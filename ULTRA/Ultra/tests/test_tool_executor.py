@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from tool_executor import ToolExecutor
+
+
+def tool_call(call_id, name, arguments="{}"):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+
+
+def sleeper(seconds):
+    def run():
+        time.sleep(seconds)
+        return json.dumps({"slept": seconds})
+    return run
+
+
+def test_parallel_timeouts_run_down_while_serial_tools_execute():
+    executor = ToolExecutor(serial_tools={"serial"}, timeouts={"slow": 0.4}, default_timeout=5.0)
+    calls = [tool_call("a", "serial"), tool_call("b", "slow"), tool_call("c", "slow")]
+    functions = {"serial": sleeper(0.3), "slow": sleeper(1.0)}
+
+    start_time = time.monotonic()
+    messages = executor.run(calls, functions)
+    elapsed = time.monotonic() - start_time
+
+    assert [message["tool_call_id"] for message in messages] == ["a", "b", "c"]
+    assert json.loads(messages[0]["content"]) == {"slept": 0.3}
+    assert "error" in json.loads(messages[1]["content"])
+    assert "error" in json.loads(messages[2]["content"])
+    assert elapsed < 0.7  # Both deadlines were 0.4 s after submission, not 0.4 s each after the serial tool
+
+
+def test_a_hung_serial_tool_does_not_hold_up_the_ones_after_it():
+    executor = ToolExecutor(serial_tools={"hang", "after"}, timeouts={"hang": 0.2, "after": 1.0})
+    release = threading.Event()
+    ran = []
+
+    def hang():
+        release.wait(2)
+        ran.append("hang")
+
+    def after():
+        ran.append("after")
+        return "done"
+
+    calls = [tool_call("a", "hang"), tool_call("b", "after")]
+    messages = executor.run(calls, {"hang": hang, "after": after})
+    next_turn = executor.run([tool_call("c", "after")], {"after": after})
+    release.set()
+
+    assert "error" in json.loads(messages[0]["content"])
+    assert messages[1]["content"] == "done"
+    assert next_turn[0]["content"] == "done"
+    assert ran == ["after", "after"]
+
+
+def test_unknown_functions_are_skipped():
+    executor = ToolExecutor()
+    messages = executor.run([tool_call("a", "missing")], {})
+    assert messages == []
@@ -0,0 +1,51 @@
+import numpy as np
+
+from vad import EnergyVAD, Endpointer
+
+RATE = 16000
+rng = np.random.default_rng(0)
+
+
+def noise(seconds, rms):
+    return (rng.standard_normal(int(seconds * RATE)) * rms).astype(np.int16)
+
+
+def speech(seconds, rms=3000):
+    t = np.arange(int(seconds * RATE)) / RATE
+    # A voiced tone, amplitude-modulated like syllables
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (np.sqrt(2) * rms * envelope * np.sin(2 * np.pi * 180 * t)).astype(np.int16)
+
+
+def frames(*parts, frame_samples=1280):
+    samples = np.concatenate(parts)
+    return [samples[i:i + frame_samples].tobytes() for i in range(0, len(samples), frame_samples)]
+
+
+def endpointer():
+    return Endpointer(EnergyVAD(), rate=RATE, trailing_silence=0.6)
+
+
+def test_speech_from_the_first_frame_is_detected():
+    utterance = endpointer().record(frames(speech(1.0), noise(1.0, 30)))
+
+    assert utterance is not None
+    assert utterance.ended_by == "silence"
+    assert 0.9 <= utterance.speech_seconds <= 1.05
+
+
+def test_a_pause_between_words_does_not_end_the_command():
+    utterance = endpointer().record(frames(noise(0.3, 30), speech(0.5), noise(0.35, 30), speech(0.5),
+                                           noise(1.0, 30)))
+
+    assert utterance is not None
+    assert utterance.speech_seconds >= 1.3  # Both words, not just the first
+
+
+def test_calibration_from_earlier_audio_sets_the_noise_floor():
+    endpoint = endpointer()
+    endpoint.calibrate(frames(noise(1.0, 400), speech(0.3)))  # A loud room, with a wake word at the end
+
+    assert 300 < endpoint.vad.noise_floor < 500
+    # The room noise alone is not taken for speech
+    assert endpoint.record(frames(noise(7.0, 400))) is None
@@ -0,0 +1,82 @@
+import json
+import time
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from fake_servers import FakeServer
+from weather_cache import WeatherCache
+
+
+@pytest.fixture
+def weather_server():
+    """A fake weatherapi.com forecast.json that counts its requests and can be made to fail."""
+    state = {"temperature": 20, "failing": False}
+
+    def handle(method, path, body):
+        if state["failing"]:
+            return 503, {"error": "unavailable"}
+        location = urllib.parse.parse_qs(urllib.parse.urlparse(path).query)["q"][0]
+        return 200, {"location": {"name": location}, "current": {"temp_c": state["temperature"]}}
+
+    with FakeServer(handle) as server:
+        server.state = state
+        yield server
+
+
+def fetcher(server):
+    def fetch(location):
+        query = urllib.parse.urlencode({"q": location})
+        with urllib.request.urlopen(f"{server.url}/v1/forecast.json?{query}", timeout=5) as response:
+            return json.load(response)
+    return fetch
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_fresh_entry_is_served_without_a_request(weather_server):
+    cache = WeatherCache(fetcher(weather_server), ttl=60)
+
+    assert cache.get("Kyiv")["current"]["temp_c"] == 20
+    assert cache.get("  kyiv ")["current"]["temp_c"] == 20
+
+    assert weather_server.request_count() == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_stale_entry_is_served_while_it_is_refreshed(weather_server):
+    cache = WeatherCache(fetcher(weather_server), ttl=0.05, stale_ttl=60)
+    cache.get("Kyiv")
+    time.sleep(0.1)
+    weather_server.state["temperature"] = 25
+
+    assert cache.get("Kyiv")["current"]["temp_c"] == 20  # Served at once, refreshed behind it
+    wait_for(lambda: weather_server.request_count() == 2 and not cache._refreshing)
+    assert cache.get("Kyiv")["current"]["temp_c"] == 25
+    assert cache.stale_hits == 1
+
+
+def test_stale_entry_survives_a_failing_upstream(weather_server):
+    cache = WeatherCache(fetcher(weather_server), ttl=0.05, stale_ttl=60)
+    cache.get("Kyiv")
+    time.sleep(0.1)
+    weather_server.state["failing"] = True
+
+    assert cache.get("Kyiv")["current"]["temp_c"] == 20
+    wait_for(lambda: weather_server.request_count() == 2 and not cache._refreshing)
+    assert cache.get("Kyiv")["current"]["temp_c"] == 20
+
+
+def test_entries_persist_across_restarts(weather_server, tmp_path):
+    cache_path = str(tmp_path / "weather_cache.json")
+    WeatherCache(fetcher(weather_server), ttl=60, cache_path=cache_path).get("Kyiv")
+
+    restarted = WeatherCache(fetcher(weather_server), ttl=60, cache_path=cache_path)
+    assert restarted.get("Kyiv")["current"]["temp_c"] == 20
+    assert weather_server.request_count() == 1
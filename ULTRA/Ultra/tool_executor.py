@@ -0,0 +1,118 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterable, List, Optional
+
+from tracing import get_tracer
+
+DEFAULT_TOOL_TIMEOUT = 20.0
+
+# Tools with side effects on the PC or on playback run one at a time, in the
+# order the model asked for them, after the independent tools have started.
+SERIAL_TOOLS = {
+    "control_pc",
+    "open_application",
+    "open_browser",
+    "manage_app_subset",
+    "search_and_play_song",
+    "toggle_spotify_playback",
+    "set_spotify_volume",
+    "set_system_volume",
+    "personal_memory",
+}
+
+TOOL_TIMEOUTS = {
+    "search_google": 30.0,
+    "get_current_weather": 10.0,
+    "use_calculator": 10.0,
+}
+
+
+class ToolExecutor:
+    """Run the tool calls of one model turn, overlapping the independent ones."""
+
+    def __init__(self, max_workers: int = 4, serial_tools: Optional[Iterable[str]] = None,
+                 timeouts: Optional[Dict[str, float]] = None, default_timeout: float = DEFAULT_TOOL_TIMEOUT):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ultra-tool")
+        # One worker, so the serial tools run one at a time and in order
+        self.serial_pool = self._new_serial_pool()
+        self.serial_tools = set(SERIAL_TOOLS if serial_tools is None else serial_tools)
+        self.timeouts = dict(TOOL_TIMEOUTS if timeouts is None else timeouts)
+        self.default_timeout = default_timeout
+
+    @staticmethod
+    def _new_serial_pool() -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="ultra-serial-tool")
+
+    def timeout_for(self, function_name: str) -> float:
+        return self.timeouts.get(function_name, self.default_timeout)
+
+    def run(self, tool_calls, available_functions: Dict[str, Callable]) -> List[Dict[str, str]]:
+        """
+        Execute the tool calls and return the tool response messages.
+
+        Messages come back in the same order as tool_calls, whatever order the
+        calls finish in. Calls to unknown functions are skipped.
+
+        Each independent tool's timeout counts from when it was submitted, so
+        they run down together while the serial tools execute. Each serial
+        tool's timeout counts from when it was handed to the serial worker; a
+        serial tool still running at its deadline is abandoned along with its
+        worker, so the tools after it (in this turn and later ones) get a
+        fresh worker instead of queueing behind it.
+        """
+        futures = {}
+        for tool_call in tool_calls:
+            function_name = tool_call.function.name
+            if function_name in available_functions and function_name not in self.serial_tools:
+                deadline = time.monotonic() + self.timeout_for(function_name)
+                futures[tool_call.id] = (function_name, deadline, self.pool.submit(
+                    self._call, function_name, available_functions[function_name], tool_call.function.arguments
+                ))
+
+        results = {}
+        for tool_call in tool_calls:
+            function_name = tool_call.function.name
+            if function_name in self.serial_tools and function_name in available_functions:
+                deadline = time.monotonic() + self.timeout_for(function_name)
+                future = self.serial_pool.submit(self._call, function_name, available_functions[function_name],
+                                                 tool_call.function.arguments)
+                results[tool_call.id] = self._result(function_name, future, deadline)
+                if not future.done():
+                    self.serial_pool.shutdown(wait=False)
+                    self.serial_pool = self._new_serial_pool()
+
+        for tool_call_id, (function_name, deadline, future) in futures.items():
+            results[tool_call_id] = self._result(function_name, future, deadline)
+
+        messages = []
+        for tool_call in tool_calls:
+            if tool_call.id in results:
+                messages.append({
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "name": tool_call.function.name,
+                    "content": str(results[tool_call.id])  # Ensure content is string
+                })
+        return messages
+
+    def _result(self, function_name: str, future, deadline: float):
+        """Wait for a tool until its deadline; a tool that hasn't started by then never will."""
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"[Ultra gave up waiting for {function_name}...]")
+            return json.dumps({
+                "error": f"{function_name} did not finish within {self.timeout_for(function_name):.0f} seconds."
+            })
+
+    @staticmethod
+    def _call(function_name: str, function: Callable, arguments: str):
+        with get_tracer().span("tool", name=function_name) as span:
+            try:
+                function_args = json.loads(arguments)
+                return function(**function_args)
+            except Exception as e:
+                span.set(error=str(e))
+                return json.dumps({"error": f"Error running tool: {str(e)}"})
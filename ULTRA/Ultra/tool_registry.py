@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+
+class ToolRegistry:
+    """
+    Tool schemas from tools.json together with the functions that implement them.
+
+    Functions register themselves with the @register decorator next to their
+    definition. The schema file is parsed once and only re-read when its
+    modification time changes, so requests don't touch the disk.
+    """
+
+    def __init__(self, schema_path: str = "tools.json"):
+        self.schema_path = schema_path
+        self.functions: Dict[str, Callable] = {}
+
+        self._schemas: List[Dict] = []
+        self._schema_mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def register(self, name: Optional[str] = None) -> Callable:
+        """Decorator that registers a function as the implementation of a tool."""
+        def decorator(function: Callable) -> Callable:
+            self.functions[name or function.__name__] = function
+            return function
+        return decorator
+
+    def get_schemas(self) -> List[Dict]:
+        """Return the tool schemas, reloading tools.json only if it changed on disk."""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.schema_path)
+            except OSError as e:
+                if self._schema_mtime is None:
+                    raise
+                print(f"Error checking {self.schema_path}, keeping the loaded tools: {e}")
+                return self._schemas
+
+            if mtime != self._schema_mtime:
+                self._load_schemas(mtime)
+            return self._schemas
+
+    def _load_schemas(self, mtime: float) -> None:
+        try:
+            with open(self.schema_path, 'r') as file:
+                schemas = json.load(file)
+        except json.JSONDecodeError as e:
+            if self._schema_mtime is None:
+                raise
+            print(f"Error parsing {self.schema_path}, keeping the loaded tools: {e}")
+            return
+
+        reloading = self._schema_mtime is not None
+        self._schemas = schemas
+        self._schema_mtime = mtime
+        if reloading:
+            print(f"Reloaded {len(schemas)} tools from {self.schema_path}.")
+            for problem in self._find_problems():
+                print(f"Tool registry: {problem}")
+
+    def validate(self) -> List[str]:
+        """Load the schemas and return every mismatch between them and the registered functions."""
+        self.get_schemas()
+        with self._lock:
+            return self._find_problems()
+
+    def _find_problems(self) -> List[str]:
+        schema_names = [schema["function"]["name"] for schema in self._schemas]
+        problems = [f"'{name}' is declared in {self.schema_path} but no function is registered for it"
+                    for name in schema_names if name not in self.functions]
+        problems += [f"'{name}' is registered but has no schema in {self.schema_path}"
+                     for name in self.functions if name not in schema_names]
+        problems += [f"'{name}' is declared more than once in {self.schema_path}"
+                     for name in set(schema_names) if schema_names.count(name) > 1]
+        problems += [f"'{name}' is registered with something that isn't callable"
+                     for name, function in self.functions.items() if not callable(function)]
+        return problems
@@ -0,0 +1,170 @@
+"""
+Per-turn latency tracing.
+
+Every stage of a turn (listen, recognition, LLM calls, tools, speech
+synthesis, playback) is recorded as a span with the id of the turn it
+belongs to, one JSON object per line:
+
+    {"turn": "3f9c1a2b", "stage": "llm", "start": 1718000000.123,
+     "duration_ms": 842.1, "thread": "Thread-4", "call": "initial"}
+
+Summarize a trace file into percentiles per stage with:
+
+    python tracing.py traces.jsonl [--last 50]
+"""
+import argparse
+import json
+import math
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+class Span:
+    """One timed stage; extra attributes can be added with set() while it runs."""
+
+    def __init__(self, tracer: "Tracer", stage: str, attributes: Dict):
+        self.tracer = tracer
+        self.stage = stage
+        self.attributes = attributes
+        self.turn = tracer.current_turn
+        self.start = None
+        self._start_counter = None
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self.start = time.time()
+        self._start_counter = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.attributes["error"] = f"{exc_type.__name__}: {exc_value}"
+        self.tracer.record(self.stage, time.perf_counter() - self._start_counter, start=self.start,
+                           turn=self.turn, **self.attributes)
+
+
+class Tracer:
+    """
+    Write spans to a JSON Lines file.
+
+    A turn is started with start_turn(); spans opened afterwards, on any
+    thread, are tagged with its id until the next turn starts. Ultra handles
+    one turn at a time, so a single current turn is enough to connect the
+    synthesis, playback and tool threads to it. Nothing is written until
+    open() is called.
+    """
+
+    def __init__(self):
+        self.file_path: Optional[str] = None
+        self.current_turn: Optional[str] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def open(self, file_path: str) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self.file_path = file_path
+            self._file = open(file_path, 'a', encoding='utf-8', buffering=1)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def start_turn(self, source: str) -> str:
+        """Begin a new turn (source is "voice" or "text") and return its id."""
+        self.current_turn = uuid.uuid4().hex[:8]
+        self.record("turn_start", 0.0, source=source)
+        return self.current_turn
+
+    def span(self, stage: str, **attributes) -> Span:
+        """Time a block: `with tracer.span("llm", call="initial") as span: ...`"""
+        return Span(self, stage, attributes)
+
+    def record(self, stage: str, duration: float, start: Optional[float] = None, turn: Optional[str] = None,
+               **attributes) -> None:
+        """Write a span that was timed elsewhere; duration is in seconds."""
+        if self._file is None:
+            return
+        entry = {
+            "turn": turn or self.current_turn,
+            "stage": stage,
+            "start": start if start is not None else time.time() - duration,
+            "duration_ms": round(duration * 1000, 3),
+            "thread": threading.current_thread().name,
+        }
+        entry.update(attributes)
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """The tracer shared by every module."""
+    return _tracer
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def load_spans(file_path: str, last_turns: Optional[int] = None) -> List[Dict]:
+    spans = []
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # A line torn by a crash
+    if last_turns:
+        turns = list(dict.fromkeys(span["turn"] for span in spans if span.get("turn")))
+        keep = set(turns[-last_turns:])
+        spans = [span for span in spans if span.get("turn") in keep]
+    return spans
+
+
+def summarize(spans: List[Dict]) -> str:
+    durations = defaultdict(list)
+    for span in spans:
+        if span["stage"] != "turn_start":
+            durations[span["stage"]].append(span["duration_ms"])
+
+    lines = [f"{'stage':<16} {'count':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}"]
+    for stage, values in sorted(durations.items(), key=lambda item: -percentile(sorted(item[1]), 0.5)):
+        values.sort()
+        lines.append(f"{stage:<16} {len(values):>6} {percentile(values, 0.5):>10.1f} {percentile(values, 0.95):>10.1f} "
+                     f"{percentile(values, 0.99):>10.1f} {values[-1]:>10.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace_file", help="JSON Lines file written by Ultra (traces.jsonl)")
+    parser.add_argument("--last", type=int, help="Only the last N turns")
+    args = parser.parse_args()
+
+    spans = load_spans(args.trace_file, args.last)
+    turns = {span["turn"] for span in spans if span.get("turn")}
+    print(f"{len(spans)} spans from {len(turns)} turns")
+    print(summarize(spans))
+
+
+if __name__ == "__main__":
+    main()
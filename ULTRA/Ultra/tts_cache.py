@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class SpeechCache:
+    """
+    Content-addressed cache of synthesized speech, keyed by (model, voice, text).
+
+    Clips are stored as files named by the SHA-256 of the key, so identical
+    phrases share one file. The directory is bounded by max_bytes, evicting the
+    least recently used clips first, and the most recent clips are also kept in
+    memory so a repeated phrase doesn't even touch the disk.
+    """
+
+    def __init__(self, directory: str = "tts_cache", max_bytes: int = 50 * 1024 * 1024,
+                 memory_items: int = 32, extension: str = "mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._files: Dict[str, Tuple[int, float]] = {}  # path -> (size, last used)
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self) -> None:
+        for name in os.listdir(self.directory):
+            if not name.endswith("." + self.extension):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self._files[path] = (stat.st_size, stat.st_mtime)
+
+    def key(self, model: str, voice: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{voice}\0{text.strip()}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.{self.extension}")
+
+    def get(self, model: str, voice: str, text: str) -> Optional[bytes]:
+        """Return the cached audio for the phrase, or None."""
+        key = self.key(model, voice, text)
+        path = self._path(key)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+            elif path in self._files:
+                try:
+                    with open(path, 'rb') as file:
+                        audio = file.read()
+                except OSError:
+                    self._files.pop(path, None)
+                if audio is not None:
+                    self._remember(key, audio)
+
+            if audio is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            now = time.time()
+            self._files[path] = (len(audio), now)
+            try:
+                os.utime(path, (now, now))  # The mtime doubles as the LRU clock across restarts
+            except OSError:
+                pass
+            return audio
+
+    def put(self, model: str, voice: str, text: str, audio: bytes) -> None:
+        """Store synthesized audio for the phrase and evict old clips past the size bound."""
+        key = self.key(model, voice, text)
+        path = self._path(key)
+        temp_path = path + ".tmp"
+        with self._lock:
+            try:
+                with open(temp_path, 'wb') as file:
+                    file.write(audio)
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"Error saving speech to cache: {e}")
+                return
+            self._files[path] = (len(audio), time.time())
+            self._remember(key, audio)
+            self._evict()
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        total = sum(size for size, _ in self._files.values())
+        if total <= self.max_bytes:
+            return
+        for path, (size, _) in sorted(self._files.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            del self._files[path]
+            self._memory.pop(os.path.basename(path).rsplit(".", 1)[0], None)
+            total -= size
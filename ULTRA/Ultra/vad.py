@@ -0,0 +1,195 @@
+import time
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+try:
+    import webrtcvad
+except ImportError:
+    webrtcvad = None
+
+VAD_FRAME_MS = 20  # webrtcvad accepts 10, 20 or 30 ms frames
+
+
+class EnergyVAD:
+    """
+    Speech/non-speech decision from frame energy and zero-crossing rate.
+
+    The noise floor follows the RMS of frames classified as silence, so the
+    threshold adapts to the room without a calibration pause. It starts from
+    calibrate() on audio from before the command when there is some, or from
+    a quiet-room default, never from the first frame, which may already be
+    speech. Quiet frames with a high zero-crossing rate (the "s" and "f" at
+    the end of a word) still count as speech if they are somewhat above the
+    floor.
+    """
+
+    def __init__(self, energy_ratio: float = 3.0, fricative_ratio: float = 1.5,
+                 zero_crossing_threshold: float = 0.25, min_rms: float = 150.0, floor_adaptation: float = 0.05,
+                 initial_noise_floor: float = 100.0, calibration_percentile: float = 20.0):
+        self.energy_ratio = energy_ratio
+        self.fricative_ratio = fricative_ratio
+        self.zero_crossing_threshold = zero_crossing_threshold
+        self.min_rms = min_rms
+        self.floor_adaptation = floor_adaptation
+        self.calibration_percentile = calibration_percentile
+        self.noise_floor = initial_noise_floor
+
+    def calibrate(self, samples: np.ndarray, rate: int) -> None:
+        """
+        Set the noise floor from audio recorded before the command. A low
+        percentile of the per-frame RMS is used, so a wake word in the
+        recording doesn't raise it.
+        """
+        piece_samples = rate * VAD_FRAME_MS // 1000
+        count = len(samples) // piece_samples
+        if count == 0:
+            return
+        pieces = samples[:count * piece_samples].astype(np.float32).reshape(count, piece_samples)
+        rms = np.sqrt(np.mean(pieces * pieces, axis=1))
+        self.noise_floor = float(np.percentile(rms, self.calibration_percentile))
+
+    def is_speech(self, samples: np.ndarray, rate: int) -> bool:
+        samples = samples.astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+
+        signs = np.signbit(samples)
+        zero_crossing_rate = np.count_nonzero(signs[1:] != signs[:-1]) / max(1, len(samples) - 1)
+
+        floor = max(self.noise_floor, 1.0)
+        speech = rms >= self.min_rms and (
+            rms > floor * self.energy_ratio
+            or (rms > floor * self.fricative_ratio and zero_crossing_rate > self.zero_crossing_threshold)
+        )
+        if not speech:
+            self.noise_floor += (rms - self.noise_floor) * self.floor_adaptation
+        return speech
+
+
+class WebRTCVAD:
+    """webrtcvad's GMM classifier; aggressiveness 0 (permissive) to 3 (strict)."""
+
+    def __init__(self, aggressiveness: int = 2):
+        self._vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, samples: np.ndarray, rate: int) -> bool:
+        return self._vad.is_speech(samples.astype(np.int16).tobytes(), rate)
+
+
+def make_vad(prefer_webrtc: bool = True):
+    """WebRTC VAD when the package is installed, otherwise the NumPy energy detector."""
+    if prefer_webrtc and webrtcvad is not None:
+        return WebRTCVAD()
+    return EnergyVAD()
+
+
+class Utterance:
+    """Audio for one spoken command and how recording ended."""
+
+    def __init__(self, pcm: bytes, rate: int, speech_seconds: float, trailing_silence: float,
+                 ended_by: str, endpoint_time: float):
+        self.pcm = pcm  # 16-bit mono
+        self.rate = rate
+        self.speech_seconds = speech_seconds
+        self.trailing_silence = trailing_silence
+        self.ended_by = ended_by  # "silence", "max_length" or "stream_closed"
+        self.endpoint_time = endpoint_time  # perf_counter() when the end was detected
+
+    @property
+    def end_of_speech_time(self) -> float:
+        """Estimated perf_counter() time at which the speaker stopped."""
+        return self.endpoint_time - self.trailing_silence
+
+    @property
+    def duration(self) -> float:
+        return len(self.pcm) / 2 / self.rate
+
+
+class Endpointer:
+    """
+    Cut one utterance out of a stream of microphone frames with a VAD.
+
+    Frames are split into VAD_FRAME_MS pieces and classified one by one.
+    Recording starts at the first run of min_speech seconds of speech (keeping
+    pre_roll seconds before it, so soft onsets aren't clipped) and ends after
+    trailing_silence seconds without speech or at max_seconds. If nobody
+    starts speaking within start_timeout seconds, record() returns None.
+
+    on_audio, if given, receives every piece of the utterance as soon as it
+    is recorded (the pre-roll at once when speech starts), so transcription
+    can begin before the endpoint.
+    """
+
+    def __init__(self, vad=None, rate: int = 16000, trailing_silence: float = 0.6, max_seconds: float = 15.0,
+                 start_timeout: float = 6.0, min_speech: float = 0.06, pre_roll: float = 0.3):
+        self.vad = vad or make_vad()
+        self.rate = rate
+        self.trailing_silence = trailing_silence
+        self.max_seconds = max_seconds
+        self.start_timeout = start_timeout
+        self.min_speech = min_speech
+        self.pre_roll = pre_roll
+
+    def calibrate(self, frames: Iterable[bytes]) -> None:
+        """Let the VAD measure the room from audio recorded just before the command, if it can use it."""
+        calibrate = getattr(self.vad, "calibrate", None)
+        data = b"".join(frames)
+        if calibrate and data:
+            calibrate(np.frombuffer(data, dtype=np.int16), self.rate)
+
+    def record(self, frames: Iterable[bytes],
+               on_audio: Optional[Callable[[np.ndarray], None]] = None) -> Optional[Utterance]:
+        piece_samples = self.rate * VAD_FRAME_MS // 1000
+        piece_seconds = VAD_FRAME_MS / 1000
+        pre_roll_pieces = int(self.pre_roll / piece_seconds)
+
+        pieces = []  # Every piece since listening began, as int16 arrays
+        onset = None  # Index of the first piece of speech
+        speech_start = None  # Index of the first piece kept, including the pre-roll
+        speech_run = 0
+        last_speech = None
+        pending = np.zeros(0, dtype=np.int16)
+
+        for frame in frames:
+            pending = np.concatenate((pending, np.frombuffer(frame, dtype=np.int16)))
+            while len(pending) >= piece_samples:
+                piece, pending = pending[:piece_samples], pending[piece_samples:]
+                pieces.append(piece)
+                index = len(pieces) - 1
+
+                if self.vad.is_speech(piece, self.rate):
+                    speech_run += 1
+                    last_speech = index
+                    if speech_start is None and speech_run * piece_seconds >= self.min_speech:
+                        onset = index - speech_run + 1
+                        speech_start = max(0, onset - pre_roll_pieces)
+                        if on_audio:
+                            for earlier in pieces[speech_start:index]:
+                                on_audio(earlier)
+                else:
+                    speech_run = 0
+
+                if speech_start is None:
+                    if len(pieces) * piece_seconds >= self.start_timeout:
+                        return None
+                    continue
+                if on_audio:
+                    on_audio(piece)
+
+                silence = (index - last_speech) * piece_seconds
+                if silence >= self.trailing_silence:
+                    return self._utterance(pieces, speech_start, onset, last_speech, silence, "silence")
+                if (index - speech_start + 1) * piece_seconds >= self.max_seconds:
+                    return self._utterance(pieces, speech_start, onset, last_speech, silence, "max_length")
+
+        if speech_start is None:
+            return None
+        silence = (len(pieces) - 1 - last_speech) * piece_seconds
+        return self._utterance(pieces, speech_start, onset, last_speech, silence, "stream_closed")
+
+    def _utterance(self, pieces, speech_start: int, onset: int, last_speech: int, silence: float,
+                   ended_by: str) -> Utterance:
+        endpoint_time = time.perf_counter()
+        pcm = np.concatenate(pieces[speech_start:]).tobytes()
+        speech_seconds = (last_speech - onset + 1) * VAD_FRAME_MS / 1000
+        return Utterance(pcm, self.rate, speech_seconds, silence, ended_by, endpoint_time)
@@ -0,0 +1,123 @@
+import collections
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence
+
+from microphone import MicrophoneStream
+
+
+class WakeWordDetector:
+    """
+    Run openwakeword on every 80 ms frame of the shared microphone stream.
+
+    Inference happens on its own thread reading from the microphone's ring
+    buffer, so a slow frame never stalls the device. When a model's score
+    crosses its threshold, on_detect(frame_index) is called with the index of
+    the first frame after the wake word; handing that to
+    MicrophoneStream.frames_since() records the command from there, so speech
+    that runs straight on from the wake word is kept.
+
+    Per-frame inference time and the thread's CPU time are recorded and
+    printed every report_interval seconds, to confirm the always-on listener
+    stays cheap.
+    """
+
+    def __init__(self, microphone: MicrophoneStream, on_detect: Callable[[int], None],
+                 models: Sequence[str] = ("hey_jarvis",), threshold: float = 0.5,
+                 thresholds: Optional[Dict[str, float]] = None, cooldown: float = 2.0,
+                 inference_framework: str = "onnx", report_interval: Optional[float] = 300):
+        self.microphone = microphone
+        self.on_detect = on_detect
+        self.models = list(models)
+        self.threshold = threshold
+        self.thresholds = thresholds or {}
+        self.cooldown = cooldown
+        self.inference_framework = inference_framework
+        self.report_interval = report_interval
+
+        self.frames = 0
+        self.detections = 0
+        self.inference_times = collections.deque(maxlen=10000)  # The last ~13 minutes of frames
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+
+        self._model = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Load the models and start listening. The microphone is started if it isn't already."""
+        if self._thread is not None:
+            return
+        from openwakeword.model import Model
+
+        self._model = Model(wakeword_models=self.models, inference_framework=self.inference_framework)
+        self.microphone.start()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ultra-wake-word")
+        self._thread.start()
+        print(f"Wake word detection started for {', '.join(self.models)}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _threshold_for(self, name: str) -> float:
+        return self.thresholds.get(name, self.threshold)
+
+    def _run(self) -> None:
+        index = self.microphone.position
+        muted_until = 0.0
+        started_wall = time.perf_counter()
+        started_cpu = time.thread_time()
+        last_report = started_wall
+
+        for samples in self.microphone.samples_since(index):
+            if self._stop.is_set():
+                break
+            index += 1
+
+            start_time = time.perf_counter()
+            scores = self._model.predict(samples)
+            self.inference_times.append(time.perf_counter() - start_time)
+            self.frames += 1
+
+            now = time.perf_counter()
+            self.wall_seconds = now - started_wall
+            self.cpu_seconds = time.thread_time() - started_cpu
+
+            if now >= muted_until:
+                for name, score in scores.items():
+                    if score >= self._threshold_for(name):
+                        self.detections += 1
+                        muted_until = now + self.cooldown
+                        # Clear the scores that are still ramping down so the same utterance doesn't fire twice
+                        self._model.reset()
+                        print(f"Wake word '{name}' detected (score {score:.2f})")
+                        try:
+                            self.on_detect(index)
+                        except Exception as e:
+                            print(f"An error occurred handling the wake word: {e}")
+                        break
+
+            if self.report_interval and now - last_report >= self.report_interval:
+                last_report = now
+                print(f"Wake word: {self.describe_stats()}")
+
+    def get_stats(self) -> Dict:
+        """Inference cost so far: per-frame latency and CPU as a share of one core."""
+        times = sorted(self.inference_times)
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "mean_inference_ms": sum(times) / len(times) * 1000 if times else None,
+            "p95_inference_ms": times[int(len(times) * 0.95)] * 1000 if times else None,
+            "cpu_percent": self.cpu_seconds / self.wall_seconds * 100 if self.wall_seconds else None,
+            "dropped_frames": self.microphone.dropped_frames,
+        }
+
+    def describe_stats(self) -> str:
+        stats = self.get_stats()
+        if not stats["frames"]:
+            return "no frames processed yet"
+        return (f"{stats['frames']} frames, inference mean {stats['mean_inference_ms']:.1f} ms / "
+                f"p95 {stats['p95_inference_ms']:.1f} ms, CPU {stats['cpu_percent']:.1f}% of one core, "
+                f"{stats['dropped_frames']} frames dropped")
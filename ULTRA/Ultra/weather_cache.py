@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class WeatherCache:
+    """
+    Forecast payloads cached per location.
+
+    A payload younger than ttl is served directly. Up to stale_ttl it is still
+    served immediately while a background thread fetches a fresh one
+    (stale-while-revalidate). Older or missing entries are fetched inline. With a
+    cache_path the entries are saved to disk, so a restart starts warm.
+    """
+
+    def __init__(self, fetch: Callable[[str], Dict], ttl: float = 300, stale_ttl: float = 1800,
+                 cache_path: Optional[str] = None):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cache_path = cache_path
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._entries: Dict[str, Dict] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(location: str) -> str:
+        return " ".join(location.lower().split())
+
+    def get(self, location: str) -> Dict:
+        """Return the forecast payload for a location. Raises whatever fetch raises on a miss."""
+        key = self._key(location)
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.time() - entry["fetched_at"] if entry else None
+
+            if entry and age < self.ttl:
+                self.hits += 1
+                return entry["payload"]
+
+            if entry and age < self.stale_ttl:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key, location), daemon=True).start()
+                return entry["payload"]
+
+            self.misses += 1
+
+        payload = self.fetch(location)
+        self._put(key, payload)
+        return payload
+
+    def _refresh(self, key: str, location: str) -> None:
+        try:
+            self._put(key, self.fetch(location))
+        except Exception as e:
+            print(f"Failed to refresh the weather for {location}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _put(self, key: str, payload: Dict) -> None:
+        with self._lock:
+            self._entries[key] = {"fetched_at": time.time(), "payload": payload}
+            self._save()
+
+    def _load(self) -> None:
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                entries = json.load(file)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Ignoring unreadable weather cache: {e}")
+            return
+        now = time.time()
+        self._entries = {key: entry for key, entry in entries.items() if now - entry["fetched_at"] < self.stale_ttl}
+
+    def _save(self) -> None:
+        if not self.cache_path:
+            return
+        temp_path = self.cache_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._entries, file)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Error saving weather cache: {e}")
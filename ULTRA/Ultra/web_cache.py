@@ -0,0 +1,159 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+class WebContentCache:
+    """
+    On-disk cache of extracted page text and of search results, in SQLite.
+
+    Pages are keyed by URL and kept with their ETag/Last-Modified validators:
+    within page_ttl they're served without touching the network, after that
+    they're revalidated with a conditional GET. The total size of cached text is
+    bounded by max_bytes, evicting the least recently used pages first. Search
+    results (query -> links) live in a separate table with a short TTL.
+    """
+
+    def __init__(self, db_path: str = "web_cache.db", max_bytes: int = 20 * 1024 * 1024,
+                 page_ttl: float = 3600, search_ttl: float = 600):
+        self.max_bytes = max_bytes
+        self.page_ttl = page_ttl
+        self.search_ttl = search_ttl
+
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                download_bytes INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+            CREATE TABLE IF NOT EXISTS searches (
+                query TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+        """)
+        self._connection.commit()
+
+    def get_page(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for a URL with a "fresh" flag, or None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content, etag, last_modified, download_bytes, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._connection.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+            self._connection.commit()
+        content, etag, last_modified, download_bytes, fetched_at = row
+        return {
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "download_bytes": download_bytes,
+            "fresh": now - fetched_at < self.page_ttl,
+        }
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        """Return the If-None-Match/If-Modified-Since headers for revalidating an entry."""
+        headers = {}
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record_hit(self, entry: Dict) -> None:
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += entry["download_bytes"]
+
+    def record_revalidated(self, url: str, entry: Dict) -> None:
+        """Mark a cached page as confirmed unchanged by a 304 response."""
+        with self._lock:
+            self.revalidations += 1
+            self.bytes_saved += entry["download_bytes"]
+            self._connection.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._connection.commit()
+
+    def put_page(self, url: str, content: str, etag: Optional[str], last_modified: Optional[str],
+                 download_bytes: int) -> None:
+        """Store freshly extracted text for a URL and evict old pages past the size bound."""
+        size = len(content.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self.misses += 1
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages (url, content, etag, last_modified, download_bytes, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, content, etag, last_modified, download_bytes, size, now, now)
+            )
+            self._evict()
+            self._connection.commit()
+
+    def _evict(self) -> None:
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for url, size in self._connection.execute("SELECT url, size FROM pages ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            total -= size
+        self._connection.executemany("DELETE FROM pages WHERE url = ?", evicted)
+
+    def get_search(self, query: str) -> Optional[Dict]:
+        """Return the cached results for a search query if they are still fresh."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload, fetched_at FROM searches WHERE query = ?", (_normalize_query(query),)
+            ).fetchone()
+        if row is None or time.time() - row[1] >= self.search_ttl:
+            return None
+        return json.loads(row[0])
+
+    def put_search(self, query: str, payload: Dict) -> None:
+        with self._lock:
+            now = time.time()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO searches (query, payload, fetched_at) VALUES (?, ?, ?)",
+                (_normalize_query(query), json.dumps(payload), now)
+            )
+            self._connection.execute("DELETE FROM searches WHERE fetched_at < ?", (now - self.search_ttl,))
+            self._connection.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.revalidations + self.misses
+            return {
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.revalidations) / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }
+
+    def describe_stats(self) -> str:
+        stats = self.stats()
+        return f"hit rate {stats['hit_rate']:.0%}, {stats['bytes_saved'] / 1024:.0f} KB saved"
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())